@@ -0,0 +1,285 @@
+"""benchmarks for pyterm hot paths
+
+usage:
+  python bench_pyterm.py [GROUP ...]          # run all or given groups
+  python bench_pyterm.py --json FILE          # save results as JSON
+  python bench_pyterm.py --compare FILE       # compare with saved results,
+                                              # exit 1 on regressions
+
+  groups: call, chain, format, init, size, progress, bytes, startup
+
+Times are in micro-seconds (us) or milli-seconds (ms), output size in
+bytes. For all results lower is better.
+The baseline is saved with:
+  python bench_pyterm.py --json bench_baseline.json
+"""
+
+import os
+import sys
+import json
+import timeit
+import contextlib
+import argparse
+import platform
+import subprocess
+from io import StringIO
+
+from pyterm import Term
+from pyterm.formatter import Formatter
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = 'bench_baseline.json'
+# result is a regression if slower than baseline by more than TOLERANCE
+TOLERANCE = 0.5
+
+
+def make_term(code='ansi', stream=None):
+    """@return Term writing to a StringIO using given code source"""
+    if stream is None:
+        stream = StringIO()
+        stream.fileno = lambda: 0
+    return Term(stream=stream, code=code, use_colors=(code != 'dumb'))
+
+
+def timeit_us(func, number):
+    """@return (float) best time in micro-seconds of a single call"""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def bench_call(number=20000):
+    """Term.__call__ with and without flush"""
+    term = make_term()
+    stream = term.stream
+    def flush():
+        term('content')
+        stream.seek(0)
+    def no_flush():
+        # 10 calls without flush and one write
+        for _ in range(10):
+            term('content', flush=False)
+        term()
+        stream.seek(0)
+    return [
+        ('call flush (us)', timeit_us(flush, number)),
+        ('call no flush (us)', timeit_us(no_flush, number // 10) / 11),
+        ]
+
+
+def bench_chain(number=20000):
+    """attribute chaining through __getattr__ compared to a Style"""
+    term = make_term()
+    stream = term.stream
+    style = term.style('BOLD', 'REVERSE', 'RED')
+    def chain():
+        term.BOLD.REVERSE.RED('x')
+        stream.seek(0)
+    def styled():
+        style('x')
+        stream.seek(0)
+    return [
+        ('chain 3 attrs (us)', timeit_us(chain, number)),
+        ('style 3 attrs (us)', timeit_us(styled, number)),
+        ]
+
+
+def bench_format(number=20000):
+    """Term.format with and without color specs,
+    and a plain (not compiled) Formatter.vformat for reference
+    """
+    term = make_term()
+    template = '{:>5} {name:|BOLD GREEN} done in {time:.2f}s {RED}!{DEFAULT}'
+    plain = '{:>5} {name} done in {time:.2f}s!'
+    args = (42,)
+    kwargs = {'name': 'task', 'time': 1.5}
+    uncompiled = lambda: Formatter.vformat(term.formatter, template,
+                                           args, kwargs)
+    compiled = lambda: term.format(template, *args, **kwargs)
+    assert uncompiled() == compiled()
+    return [
+        ('format uncompiled (us)', timeit_us(uncompiled, number)),
+        ('format color (us)', timeit_us(compiled, number)),
+        ('format no color (us)', timeit_us(
+            lambda: term.format(plain, *args, **kwargs), number)),
+        ]
+
+
+def bench_init(number=20000):
+    """Term construction and code resolution, code tables are computed
+    once per process so this measures the cached path (cold init is
+    part of 'first output' in the startup group)
+    """
+    stream = StringIO()
+    stream.fileno = lambda: 0
+    return [
+        ('init cached %s (us)' % code, timeit_us(
+            lambda: make_term(code, stream).code, number))
+        for code in ('curses', 'ansi', 'dumb')]
+
+
+def bench_size(number=20000):
+    """Term.cols() and Term.lines()"""
+    if sys.__stdout__.isatty():
+        context = contextlib.nullcontext(sys.__stdout__)
+    else:
+        context = open(os.devnull)
+    with context as stream:
+        term = make_term('ansi', stream)
+        return [
+            ('cols (us)', timeit_us(term.cols, number)),
+            ('lines (us)', timeit_us(term.lines, number)),
+            ]
+
+
+def bench_progress(number=2000):
+    """ProgressBar.update"""
+    from sample_bar import ProgressBar
+    term = make_term()
+    stream = term.stream
+    bar = ProgressBar(term, 'header')
+    def update():
+        bar.update(0.5, 'working')
+        stream.seek(0)
+    return [('progress update (us)', timeit_us(update, number))]
+
+
+def output_bytes(func, **term_args):
+    """@return (int) number of bytes written by func(term)"""
+    stream = StringIO()
+    term = Term(stream=stream, code='ansi', use_colors=True, **term_args)
+    func(term)
+    term.flush()
+    return len(stream.getvalue().encode('utf-8'))
+
+
+def progress_bar(term):
+    """draw a progress bar with 100 updates"""
+    from sample_bar import ProgressBar
+    bar = ProgressBar(term, 'header')
+    for num in range(100):
+        bar.update(num / 100.0, 'item %s' % num)
+    bar.clear()
+
+
+def bench_bytes():
+    """output size (bytes) of demo and progress bar with optimize_sgr"""
+    results = []
+    for name, func in (('demo', Term.demo), ('progress', progress_bar)):
+        results.extend([
+            ('bytes %s' % name, output_bytes(func)),
+            ('bytes %s sgr' % name, output_bytes(func, optimize_sgr=True)),
+            ('bytes %s sgr+buffer' % name,
+             output_bytes(func, optimize_sgr=True, buffering='explicit')),
+            ])
+    return results
+
+
+STARTUP_SCRIPT = """
+import os, time
+start = time.perf_counter()
+import pyterm
+imported = time.perf_counter()
+term = pyterm.Term(stream=open(os.devnull, 'w'), use_colors=True)
+term.BLUE('x')
+done = time.perf_counter()
+print((imported - start) * 1e3, (done - imported) * 1e3)
+"""
+
+def bench_startup(runs=20):
+    """import time and first output (including codes resolution) in ms,
+    each run in a new interpreter (byte-code is compiled before)
+    """
+    subprocess.check_call([sys.executable, '-m', 'compileall', '-q',
+                           os.path.join(HERE, 'pyterm')])
+    env = dict(os.environ, PYTHONPATH=HERE)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    imports, outputs = [], []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', STARTUP_SCRIPT],
+                                      env=env)
+        import_ms, output_ms = out.split()
+        imports.append(float(import_ms))
+        outputs.append(float(output_ms))
+    return [
+        ('import pyterm (ms)', min(imports)),
+        ('first output (ms)', min(outputs)),
+        ]
+
+
+GROUPS = [
+    ('call', bench_call),
+    ('chain', bench_chain),
+    ('format', bench_format),
+    ('init', bench_init),
+    ('size', bench_size),
+    ('progress', bench_progress),
+    ('bytes', bench_bytes),
+    ('startup', bench_startup),
+    ]
+
+
+def compare(results, baseline, tolerance):
+    """print comparison of results with baseline
+    @return (list - str) names of results slower than baseline
+    """
+    regressions = []
+    for name, value in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = value / baseline[name] if baseline[name] else 1.0
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        print('{:<30} {:12.3f} {:12.3f} {:+8.1%} {}'.format(
+            name, baseline[name], value, ratio - 1, flag))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='pyterm benchmarks')
+    parser.add_argument('groups', nargs='*', metavar='GROUP',
+                        help='benchmark groups to run (default: all)')
+    parser.add_argument('--json', metavar='FILE',
+                        help='save results as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare with saved results (%s)' %
+                        os.path.basename(BASELINE))
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed slowdown ratio (default: %s)' %
+                        TOLERANCE)
+    args = parser.parse_args(argv)
+    unknown = set(args.groups) - set(name for name, _ in GROUPS)
+    if unknown:
+        parser.error('unknown groups: %s' % ', '.join(sorted(unknown)))
+
+    results = {}
+    for name, func in GROUPS:
+        if args.groups and name not in args.groups:
+            continue
+        for result_name, value in func():
+            results[result_name] = value
+            if not args.compare:
+                print('{:<30} {:12.3f}'.format(result_name, value))
+
+    if args.json:
+        data = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'results': results,
+            }
+        with open(args.json, 'w') as fp:
+            json.dump(data, fp, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)['results']
+        print('{:<30} {:>12} {:>12} {:>8}'.format(
+            'name', 'baseline', 'current', 'change'))
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -31,6 +31,13 @@ def task_test():
         'file_dep': PY_FILES,
         }
 
+def task_bench():
+    """run benchmarks and compare with saved baseline"""
+    return {
+        'actions': ['python bench_pyterm.py --compare bench_baseline.json'],
+        'verbosity': 2,
+        }
+
 def task_coverage():
     return {
         'actions': ['py.test --cov pyterm --cov test_pyterm.py --cov-report term-missing'],
@@ -41,20 +48,21 @@ def task_coverage():
 def task_docs():
     yield {
         'name': 'terminal',
-        'actions': ['python ddemo.py | ansi2html --partial --scheme=xterm > _tutorial.html'],
-        'file_dep': ['pyterm.py', 'tutorial.py', 'ddemo.py',],
+        'actions': ['python ddemo.py | python -m pyterm.tohtml > _tutorial.html'],
+        'file_dep': ['pyterm/pyterm.py', 'pyterm/tohtml.py',
+                     'tutorial.py', 'ddemo.py',],
         'targets': ['_tutorial.html'],
         }
 
     def render_template():
-        from ansi2html import Ansi2HTMLConverter
+        from pyterm.tohtml import HTML_STYLE
 
         with open('index.tmpl', 'r') as f: template = f.read()
         with open('_tutorial.html', 'r') as f: terminal = f.read()
-        header = Ansi2HTMLConverter(scheme='xterm').produce_headers()
+        header = '<style type="text/css">\n%s</style>' % HTML_STYLE
         with open('docs/index.html', 'w') as html:
             html.write(template.format(
-                ansi2html_head=header,
+                style_head=header,
                 terminal=terminal))
 
     yield {
@@ -1 +1,2 @@
-from .pyterm import Term, escape
+from .pyterm import Term, Style, escape
+from .screen import Screen
@@ -0,0 +1,149 @@
+"""asyncio terminal output
+
+`AsyncTerm` has the same API as `Term` but writes go to an asyncio
+transport, so a slow terminal/pipe never blocks the event loop.
+Producers apply backpressure by awaiting `drain()`::
+
+    async with AsyncTerm() as term:
+        for line in lines:
+            term.GREEN(line)('\\n')
+            await term.drain()
+"""
+
+import os
+import asyncio
+
+from .pyterm import Term
+
+
+DRAIN_LIMIT = 64 * 1024 # bytes, drain() waits while transport holds more
+MAX_BUFFER = 1024 * 1024 # bytes, writing more than this raises BufferError
+
+
+class _WriteProtocol(asyncio.Protocol):
+    """protocol keeping track of transport flow control"""
+    def __init__(self):
+        self._paused = False
+        self._waiters = []
+        self._exc = None
+
+    def _wakeup(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._wakeup()
+
+    def connection_lost(self, exc):
+        self._exc = exc or ConnectionResetError('Connection lost')
+        self._wakeup()
+
+    async def wait_writable(self):
+        """wait until transport buffer is below its low-water mark"""
+        if self._paused and self._exc is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        if self._exc is not None:
+            raise self._exc
+
+
+class AsyncTerm(Term):
+    """Term writing to an asyncio pipe transport
+
+    Until `connect` is called (or if the stream is not a pipe, socket or
+    character device) output is written synchronously to the stream.
+
+    @ivar transport: (asyncio.WriteTransport) or None
+    """
+    def __init__(self, stream=None, limit=DRAIN_LIMIT, max_buffer=MAX_BUFFER,
+                 **kwargs):
+        """
+        @param limit: (int) `drain` waits while the transport holds
+                      more than `limit` bytes
+        @param max_buffer: (int) max bytes held by the transport,
+                           writing more raises BufferError and the
+                           output is discarded (retry after `drain`)
+        other params same as `Term`
+        """
+        Term.__init__(self, stream, **kwargs)
+        self.limit = limit
+        self.max_buffer = max_buffer
+        self.transport = None
+        self._protocol = None
+        self._blocking = None # blocking mode of stream before connect
+        self._encoding = getattr(self.stream, 'encoding', None) or 'utf-8'
+
+    async def connect(self):
+        """create transport for the stream's file descriptor
+
+        A duplicate of the file descriptor is used so closing the transport
+        does not close the stream. The file is in non-blocking mode until
+        `close` (the mode is shared by duplicated descriptors).
+        """
+        loop = asyncio.get_running_loop()
+        self.stream.flush()
+        fd = self.stream.fileno()
+        self._blocking = os.get_blocking(fd)
+        pipe = os.fdopen(os.dup(fd), 'wb', buffering=0)
+        try:
+            self.transport, self._protocol = await loop.connect_write_pipe(
+                _WriteProtocol, pipe)
+        except ValueError:
+            # regular files do not block, keep writing to stream
+            pipe.close()
+            self._restore_blocking()
+            return
+        self.transport.set_write_buffer_limits(high=self.limit)
+
+    def _write(self, text):
+        if self.transport is None:
+            self.stream.write(text)
+            return
+        data = text.encode(self._encoding)
+        if self.transport.get_write_buffer_size() + len(data) > \
+                self.max_buffer:
+            # rejected output is not kept for the next write
+            self._buffer = self._codes['DEFAULT']
+            if self._chunks:
+                self._chunks = []
+                self._pending = 0
+            raise BufferError("AsyncTerm buffer is full, await drain()")
+        self.transport.write(data)
+
+    async def drain(self):
+        """write pending output and wait until the transport buffer
+        is below `limit`
+        """
+        self.flush()
+        if self._protocol is not None:
+            await self._protocol.wait_writable()
+
+    async def close(self):
+        """drain and close the transport"""
+        await self.drain()
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = self._protocol = None
+            # let the event loop release the transport
+            await asyncio.sleep(0)
+        self._restore_blocking()
+
+    def _restore_blocking(self):
+        """set blocking mode of stream as before `connect`"""
+        if self._blocking is not None:
+            os.set_blocking(self.stream.fileno(), self._blocking)
+            self._blocking = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
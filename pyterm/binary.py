@@ -0,0 +1,129 @@
+"""bytes-native terminal output
+
+`BinaryTerm` keeps codes as `bytes` and builds output in a reusable
+`bytearray` that is written to the binary layer of the stream
+(`stream.buffer`) or directly to its file descriptor, skipping the
+decode/encode round trip and the `TextIOWrapper`.
+"""
+
+import os
+import time
+import select
+
+from .pyterm import Term, decode
+
+
+class BinaryTerm(Term):
+    """Term writing bytes
+
+    Content may be given as `bytes` or `str` (encoded with `encoding`).
+    `format` still returns `str`. Option `optimize_sgr` is not supported.
+
+    @ivar encoding: (str) used to encode `str` content
+    """
+    __slots__ = ('encoding', '_out', '_fd', '_line_buffering')
+
+    _EMPTY = b''
+
+    def __init__(self, stream=None, encoding='utf-8', raw=False, **kwargs):
+        """
+        @param encoding: (str) encoding used for `str` content
+        @param raw: (bool) write directly to file descriptor of stream
+        other params same as `Term`
+        """
+        Term.__init__(self, stream, **kwargs)
+        self.encoding = encoding
+        # binary streams (BytesIO, files opened 'wb') have no buffer
+        self._out = getattr(self.stream, 'buffer', self.stream)
+        # text written before must not be written after our output
+        self.stream.flush()
+        self._fd = self.stream.fileno() if raw else None
+        self._line_buffering = getattr(self.stream, 'line_buffering', False)
+
+    def _decode_codes(self, codes):
+        return dict(codes)
+
+    def _resolve_codes(self):
+        Term._resolve_codes(self)
+        self._buffer = bytearray(self._buffer)
+        self._renderer = None
+
+    @property
+    def formatter(self):
+        """(ColorFormatter) using codes decoded to `str`"""
+        if self._formatter is None:
+            from .color import ColorCodes
+            from .formatter import ColorFormatter
+            codes = dict((k, decode(v)) for k, v in self._codes.items())
+            colors = ColorCodes(codes, self._color_codes().depth, self.code)
+            self._formatter = ColorFormatter(codes, colors)
+        return self._formatter
+
+    def _codes_changed(self):
+        # formatter uses a decoded copy of the codes
+        Term._codes_changed(self)
+        self._formatter = None
+
+    def __call__(self, content=b'', flush=True):
+        """adds given content & default_end to buffer, writes buffer if 'flush
+        @return self (in order to allow chaining)
+        """
+        buffer = self._buffer
+        if content.__class__ is str:
+            content = content.encode(self.encoding)
+        buffer += content
+        buffer += self._codes['NORMAL']
+        if flush:
+            chunks = self._chunks
+            if chunks is None:
+                self._write(buffer)
+            else:
+                chunks += buffer
+                self._pending = len(chunks)
+                if (self._pending >= self._buffer_size or
+                    (self._policy == 'line' and b'\n' in content) or
+                    (self._policy == 'time' and
+                     time.time() - self._last_flush >= self._interval)):
+                    self.flush()
+            # re-use buffer
+            del buffer[:]
+            buffer += self._codes['DEFAULT']
+        return self
+
+    def set_buffering(self, *args, **kwargs):
+        Term.set_buffering(self, *args, **kwargs)
+        if self._chunks is not None:
+            self._chunks = bytearray()
+
+    def flush(self):
+        """write all pending output to stream"""
+        if self._chunks:
+            self._write(self._chunks)
+            del self._chunks[:]
+            self._pending = 0
+        Term.flush(self)
+
+    def _write(self, data):
+        """write data (bytes-like) to stream.buffer or file descriptor
+
+        data may be the reused buffer (cleared after the call), streams
+        get a copy as they may keep a reference to it.
+        """
+        if self._fd is None:
+            if data.__class__ is bytearray:
+                data = bytes(data)
+            self._out.write(data)
+            # same as TextIOWrapper with line_buffering (interactive)
+            if self._line_buffering and (b'\n' in data or b'\r' in data):
+                self._out.flush()
+            return
+        fd = self._fd
+        with memoryview(data) as view:
+            total = len(view)
+            written = 0
+            while written < total:
+                try:
+                    written += os.write(fd, view[written:])
+                except BlockingIOError:
+                    # non-blocking fd is full, wait until writable
+                    select.select([], [fd], [])
@@ -0,0 +1,173 @@
+"""heatmaps and sparklines
+
+Numbers are mapped to colors by a `ColorScale`, codes of all its steps
+are computed on creation. Rows are rendered in a single pass merging
+adjacent cells with the same color into a run (one color code per run),
+and each row is written with a single call::
+
+    scale = ColorScale(term, ('#000080', '#ffff00', '#ff0000'), 0, 100)
+    heatmap(term, matrix, scale)
+    sparkline(term, values)
+
+Rows may be lists, `array.array` or any object supporting the buffer
+protocol (a 2 dimensional buffer is a matrix). On a `BinaryTerm` rows
+are rendered as bytes.
+"""
+
+import itertools
+
+from .color import parse_rgb
+
+
+# characters used by sparkline, from lowest to highest
+BLOCKS = '▁▂▃▄▅▆▇█'
+
+
+class ColorScale(object):
+    """map numbers in range [low, high] to color codes
+
+    @ivar codes: (list - str) code of each step
+    """
+    def __init__(self, term, colors=('#0000ff', '#ff0000'), low=0.0,
+                 high=1.0, steps=32, background=True):
+        """
+        @param colors: sequence of RGB colors ('#rrggbb'), interpolated
+                       in `steps` steps, or of capability/color names
+                       (each name is a step)
+        @param background: (bool) RGB colors set the background
+        """
+        self.low = low
+        self.high = high
+        if all(color.startswith('#') for color in colors):
+            rgb_codes = term._color_codes()
+            stops = [parse_rgb(color) for color in colors]
+            self.codes = [rgb_codes.rgb(*rgb, background=background)
+                          for rgb in _gradient(stops, steps)]
+        else:
+            self.codes = [term[name] for name in colors]
+        span = float(high - low)
+        self._factor = len(self.codes) / span if span else 0.0
+        self._last = len(self.codes) - 1
+
+    def index(self, value):
+        """@return (int) step of value"""
+        index = int((value - self.low) * self._factor)
+        return min(max(index, 0), self._last)
+
+    def code(self, value):
+        """@return (str) color code of value"""
+        return self.codes[self.index(value)]
+
+    def map(self, values):
+        """@return (list - str) color codes of values"""
+        codes, low, factor, last = self.codes, self.low, self._factor, \
+                                   self._last
+        return [codes[min(max(int((value - low) * factor), 0), last)]
+                for value in values]
+
+
+def _gradient(stops, steps):
+    """@return (list - tuple) `steps` RGB colors interpolated from stops"""
+    if steps == 1 or len(stops) == 1:
+        return stops[:1] * steps
+    colors = []
+    for step in range(steps):
+        pos = step * (len(stops) - 1) / float(steps - 1)
+        index = min(int(pos), len(stops) - 2)
+        frac = pos - index
+        start, end = stops[index], stops[index + 1]
+        colors.append(tuple(int(round(a + (b - a) * frac))
+                            for a, b in zip(start, end)))
+    return colors
+
+
+def _rows(matrix, width):
+    """@return iterable of rows of matrix"""
+    try:
+        view = memoryview(matrix)
+    except TypeError:
+        view = None
+    if view is not None and view.ndim == 2:
+        return view.tolist()
+    if width is None:
+        return matrix
+    if view is not None:
+        matrix = view.tolist()
+    return (matrix[start:start + width]
+            for start in range(0, len(matrix), width))
+
+
+def _text(term, text):
+    """@return text as the type of term's codes (str or bytes)"""
+    if isinstance(term._EMPTY, bytes):
+        return text.encode(term.encoding)
+    return text
+
+
+def render_runs(codes, cell, normal):
+    """@return a cell for each code, one code per run of equal codes
+    @param codes: sequence of codes
+    @param cell, normal: same type as codes (str or bytes)
+    """
+    out = [code + cell * len(list(run))
+           for code, run in itertools.groupby(codes)]
+    out.append(normal)
+    return normal[:0].join(out)
+
+
+def _render_chars(codes, chars, normal):
+    """@return chars with codes, one code per run of equal codes
+    @param chars: (str) one char for each code, or a list of bytes
+                  when codes are bytes
+    """
+    out = []
+    pos = 0
+    for code, run in itertools.groupby(codes):
+        size = len(list(run))
+        out.append(code + normal[:0].join(chars[pos:pos + size]))
+        pos += size
+    out.append(normal)
+    return normal[:0].join(out)
+
+
+def heatmap_rows(term, matrix, scale, cell='  ', width=None):
+    """@return iterator of rendered rows (ending with new-line)
+    @param width: (int) split a flat sequence in rows of width values
+    """
+    normal = term['NORMAL']
+    cell = _text(term, cell)
+    newline = _text(term, '\n')
+    for row in _rows(matrix, width):
+        yield render_runs(scale.map(row), cell, normal) + newline
+
+
+def heatmap(term, matrix, scale, cell='  ', width=None):
+    """write matrix of numbers as colored cells, one write per row
+    @return term
+    """
+    for line in heatmap_rows(term, matrix, scale, cell, width):
+        term(line)
+    return term
+
+
+def sparkline(term, values, low=None, high=None, scale=None):
+    """write values as a line of block characters (in a single write)
+
+    @param low, high: range of values (default: min/max of values)
+    @param scale: (ColorScale) to color characters
+    @return term
+    """
+    values = list(values)
+    if not values:
+        return term
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    factor = (len(BLOCKS) - 1) / float(high - low) if high != low else 0.0
+    last = len(BLOCKS) - 1
+    chars = ''.join(BLOCKS[min(max(int((value - low) * factor + 0.5), 0),
+                               last)] for value in values)
+    if scale is None:
+        return term(chars)
+    if isinstance(term._EMPTY, bytes):
+        chars = [_text(term, char) for char in chars]
+    return term(_render_chars(scale.map(values), chars, term['NORMAL']))
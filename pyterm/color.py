@@ -0,0 +1,203 @@
+"""RGB colors
+
+RGB colors are sent as truecolor codes (ESC[38;2;r;g;bm) on terminals
+that support it, otherwise they are replaced by the nearest color
+of the 256, 16 or 8 colors palette.
+Nearest colors are found with lookup tables (computed once per process)
+and codes are cached, so using the same colors on every frame is cheap.
+
+Colors are given as `(r, g, b)` or as strings `#rrggbb`/`#rgb`,
+background colors in format specs are prefixed by `BG_`::
+
+    term.rgb(255, 136, 0)('orange')
+    term.format('{:|#ff8800}', 'orange')
+    term.format('{:|BG_#003366}', 'on dark blue')
+"""
+
+import os
+import bisect
+
+
+TRUECOLOR = 1 << 24
+
+# max number of codes kept by each ColorCodes
+CACHE_SIZE = 4096
+
+# xterm colors 0-15
+PALETTE = (
+    (0x00, 0x00, 0x00), (0xcd, 0x00, 0x00), (0x00, 0xcd, 0x00),
+    (0xcd, 0xcd, 0x00), (0x00, 0x00, 0xee), (0xcd, 0x00, 0xcd),
+    (0x00, 0xcd, 0xcd), (0xe5, 0xe5, 0xe5), (0x7f, 0x7f, 0x7f),
+    (0xff, 0x00, 0x00), (0x00, 0xff, 0x00), (0xff, 0xff, 0x00),
+    (0x5c, 0x5c, 0xff), (0xff, 0x00, 0xff), (0x00, 0xff, 0xff),
+    (0xff, 0xff, 0xff),
+    )
+# levels of each channel in 6x6x6 color cube (16-231)
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+
+def _nearest_table(levels):
+    """@return (bytes) index of nearest level for each value 0-255"""
+    middles = [(a + b) / 2.0 for a, b in zip(levels, levels[1:])]
+    return bytes(bisect.bisect_left(middles, v) for v in range(256))
+
+# nearest cube level and gray (232-255) for each value 0-255
+_CUBE = _nearest_table(CUBE_LEVELS)
+_GRAYS = tuple(8 + 10 * i for i in range(24))
+_GRAY = _nearest_table(_GRAYS)
+
+
+def index_rgb(index):
+    """@return (tuple - int) RGB of a color of the 256 colors palette"""
+    if index < 16:
+        return PALETTE[index]
+    if index < 232:
+        index -= 16
+        return (CUBE_LEVELS[index // 36], CUBE_LEVELS[index // 6 % 6],
+                CUBE_LEVELS[index % 6])
+    gray = _GRAYS[index - 232]
+    return (gray, gray, gray)
+
+
+def _distance(rgb1, rgb2):
+    return sum((a - b) * (a - b) for a, b in zip(rgb1, rgb2))
+
+
+def nearest_256(r, g, b):
+    """@return (int) index of nearest color in 256 colors palette
+    (only colors 16-255, colors 0-15 are often redefined)
+    """
+    cube = (_CUBE[r], _CUBE[g], _CUBE[b])
+    index = 16 + 36 * cube[0] + 6 * cube[1] + cube[2]
+    gray = _GRAY[(r + g + b) // 3]
+    if _distance(index_rgb(index), (r, g, b)) <= \
+            _distance(index_rgb(232 + gray), (r, g, b)):
+        return index
+    return 232 + gray
+
+
+# lookup tables for palettes of 8 and 16 colors, key: size of palette
+# index by 4 most significant bits of each channel
+_PALETTE_TABLES = {}
+
+def _palette_table(size):
+    """@return (bytes) nearest palette color for 16x16x16 RGB cells"""
+    try:
+        return _PALETTE_TABLES[size]
+    except KeyError:
+        pass
+    palette = PALETTE[:size]
+    table = bytearray(4096)
+    for cell in range(4096):
+        # center of cell
+        rgb = ((cell >> 8) * 16 + 8, (cell >> 4 & 15) * 16 + 8,
+               (cell & 15) * 16 + 8)
+        table[cell] = min(range(size),
+                          key=lambda i: _distance(palette[i], rgb))
+    table = _PALETTE_TABLES[size] = bytes(table)
+    return table
+
+def nearest_palette(r, g, b, size=16):
+    """@return (int) index of nearest color in palette of 8 or 16 colors"""
+    return _palette_table(size)[(r >> 4) << 8 | (g >> 4) << 4 | b >> 4]
+
+
+def parse_rgb(color):
+    """@return (tuple - int) RGB from string '#rrggbb' or '#rgb'"""
+    digits = color.lstrip('#')
+    if len(digits) == 3:
+        digits = ''.join(d * 2 for d in digits)
+    if len(digits) != 6:
+        raise ValueError("Invalid color: %r" % (color,))
+    value = int(digits, 16)
+    return (value >> 16, value >> 8 & 255, value & 255)
+
+
+def color_depth(source):
+    """@return (int) number of colors supported by terminal
+    @param source: (str) source of codes (curses, ansi, dumb)
+    """
+    if source == 'dumb':
+        return 0
+    if os.environ.get('COLORTERM') in ('truecolor', '24bit'):
+        return TRUECOLOR
+    if source == 'curses':
+        try:
+            import curses
+            return max(curses.tigetnum('colors'), 8)
+        except Exception:
+            pass
+    if '256color' in os.environ.get('TERM', ''):
+        return 256
+    return 8
+
+
+class ColorCodes(object):
+    """codes of RGB colors for a code table
+
+    @ivar depth: (int) number of colors used (TRUECOLOR, 256, 16, 8 or 0)
+    """
+    def __init__(self, codes, depth, source=None):
+        """
+        @param codes: (dict) code table, RGB codes have the same type
+                      as its codes (str or bytes)
+        @param source: (str) 'curses' to use terminfo `setaf`/`setab`
+                       for palette colors
+        """
+        self.depth = depth
+        self._binary = isinstance(codes['NORMAL'], bytes)
+        self._setaf = None
+        if source == 'curses' and codes['A_COLOR']:
+            self._setaf = (codes['A_COLOR'], codes['A_BG_COLOR'])
+        self._cache = {} # key: (r, g, b, background) or color name
+
+    def _index_code(self, index, background):
+        """@return (str) code of palette color"""
+        if self._setaf is not None:
+            import curses
+            template = self._setaf[background]
+            if not isinstance(template, bytes):
+                template = template.encode('latin-1')
+            return curses.tparm(template, index).decode('latin-1')
+        if index < 8:
+            return '\x1b[%dm' % ((40 if background else 30) + index)
+        if index < 16:
+            return '\x1b[%dm' % ((100 if background else 90) + index - 8)
+        return '\x1b[%d;5;%dm' % (48 if background else 38, index)
+
+    def rgb(self, r, g, b, background=False):
+        """@return code for RGB color"""
+        key = (r, g, b, background)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        depth = self.depth
+        if depth >= TRUECOLOR:
+            code = '\x1b[%d;2;%d;%d;%dm' % (48 if background else 38,
+                                           r, g, b)
+        elif depth >= 256:
+            code = self._index_code(nearest_256(r, g, b), background)
+        elif depth >= 8:
+            code = self._index_code(
+                nearest_palette(r, g, b, 16 if depth >= 16 else 8),
+                background)
+        else:
+            code = ''
+        if self._binary:
+            code = code.encode('latin-1')
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = code
+        return code
+
+    def code(self, name):
+        """@return code for color name '#rrggbb' or 'BG_#rrggbb'"""
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        background = name.startswith('BG_')
+        rgb = parse_rgb(name[3:] if background else name)
+        code = self._cache[name] = self.rgb(*rgb, background=background)
+        return code
@@ -0,0 +1,181 @@
+"""cheapest cursor movement
+
+Like curses `mvcur`, `Movement` picks the shortest sequence of codes
+(in characters) to move the cursor among:
+
+ - single steps repeated (`UP`, `DOWN`, `LEFT`, `RIGHT`)
+ - parameterized relative moves (`UP_N`, `DOWN_N`, `LEFT_N`, `RIGHT_N`)
+ - carriage return plus offset (`BOL` then moving right)
+ - absolute position (`MOVE`)
+
+The cost of each kind of move is computed once for a code table,
+only the codes of the cheapest move are built::
+
+    term.move_to(10, 0, cur_row=12, cur_col=40)('text')
+
+A `Term` shares its `Movement` with Terms using the same codes.
+"""
+
+from .pyterm import tparm
+
+
+INFINITE = float('inf')
+
+# (single step, parameterized) capability names for each direction
+STEPS = (('UP', 'UP_N'), ('DOWN', 'DOWN_N'),
+         ('LEFT', 'LEFT_N'), ('RIGHT', 'RIGHT_N'))
+
+
+def _digits(number):
+    """@return (int) number of digits of a non negative number"""
+    return len(str(number))
+
+
+class Movement(object):
+    """cursor movements for a code table
+
+    Empty codes are moves not supported by the terminal. If all codes
+    are empty (dumb terminal) every move is an empty string.
+
+    @ivar dumb: (bool) no movement codes at all
+    """
+    def __init__(self, codes, source):
+        """
+        @param codes: (dict) code table
+        @param source: (str) source of codes (curses, ansi, dumb)
+        """
+        self.codes = codes
+        self.source = source
+        self._empty = codes['NORMAL'][:0]
+        self._newline = b'\n' if isinstance(self._empty, bytes) else '\n'
+        self._percent = b'%' if isinstance(self._empty, bytes) else '%'
+        names = [name for pair in STEPS for name in pair]
+        names += ['BOL', 'MOVE']
+        self.dumb = not any(codes.get(name) for name in names)
+        # key: direction (single step name), value: (code, cost)
+        self._single = {}
+        # key: direction (single step name), value: (template, base cost)
+        self._param = {}
+        for single, param in STEPS:
+            code = codes.get(single)
+            self._single[single] = (code, len(code) if code else INFINITE)
+            self._param[single] = self._template(param, 1)
+        bol = codes.get('BOL')
+        self._bol = (bol, len(bol) if bol else INFINITE)
+        self._cup = self._template('MOVE', 0, 0)
+
+    def _template(self, name, *params):
+        """@return (template, base cost) of parameterized capability.
+        base cost is the cost without the digits of params
+        (cost is INFINITE if capability not available).
+        """
+        template = self.codes.get(name)
+        if not template or self._percent not in template:
+            return (None, INFINITE)
+        code = tparm(self.source, template, *params)
+        return (template, len(code) - len(params))
+
+    def step_cost(self, direction, count):
+        """@return cost to move count cells in direction"""
+        if count == 0:
+            return 0
+        single_cost = self._single[direction][1] * count
+        param_cost = self._param[direction][1] + _digits(count)
+        return min(single_cost, param_cost)
+
+    def step(self, direction, count, keep_col=False):
+        """@return codes to move count cells in direction (UP, DOWN...)
+        @param keep_col: (bool) do not use a line-feed (`DOWN` on some
+                         terminals) that might change the column
+        """
+        if count == 0 or self.dumb:
+            return self._empty
+        code, cost = self._single[direction]
+        template, base = self._param[direction]
+        if keep_col and code and self._newline in code:
+            cost = INFINITE
+        single_cost = cost * count
+        param_cost = base + _digits(count)
+        if single_cost == param_cost == INFINITE:
+            raise ValueError("Terminal isn't capable enough to move "
+                             "cursor %s" % direction)
+        if single_cost <= param_cost:
+            return code * count
+        return tparm(self.source, template, count)
+
+    def vertical(self, rows, keep_col=False):
+        """@return codes to move rows lines down (up if negative)"""
+        if rows < 0:
+            return self.step('UP', -rows)
+        return self.step('DOWN', rows, keep_col)
+
+    def horizontal_cost(self, cur_col, col):
+        """@return cost to move from cur_col to col in the same line
+        @param cur_col: (int) current column, None if unknown
+        """
+        home = self._bol[1] + self.step_cost('RIGHT', col)
+        if cur_col is None:
+            return home
+        if cur_col <= col:
+            return self.step_cost('RIGHT', col - cur_col)
+        return min(self.step_cost('LEFT', cur_col - col), home)
+
+    def horizontal(self, cur_col, col):
+        """@return codes to move from cur_col to col in the same line
+        @param cur_col: (int) current column, None if unknown
+        """
+        if self.dumb or cur_col == col:
+            return self._empty
+        if cur_col is not None:
+            if cur_col < col:
+                return self.step('RIGHT', col - cur_col)
+            home = self._bol[1] + self.step_cost('RIGHT', col)
+            if self.step_cost('LEFT', cur_col - col) < home:
+                return self.step('LEFT', cur_col - col)
+        if self._bol[0] is None:
+            raise ValueError("Terminal isn't capable enough to move cursor")
+        return self._bol[0] + self.step('RIGHT', col)
+
+    def relative(self, cur_row, cur_col, row, col):
+        """@return codes to move from (cur_row, cur_col) to (row, col)
+        using relative moves only
+        """
+        vertical, cur_col = self._vertical(cur_row, cur_col, row, col)
+        return vertical + self.horizontal(cur_col, col)
+
+    def _vertical(self, cur_row, cur_col, row, col):
+        """@return (codes, column after move) to move to row, followed
+        by a move to col
+        """
+        vertical = self.vertical(row - cur_row)
+        if self._newline not in vertical:
+            return vertical, cur_col
+        # column after a line-feed depends on tty settings
+        if cur_col is not None and self._param['DOWN'][0] is not None:
+            keep_col = self.vertical(row - cur_row, True)
+            if (len(keep_col) + self.horizontal_cost(cur_col, col) <
+                    len(vertical) + self.horizontal_cost(None, col)):
+                return keep_col, cur_col
+        return vertical, None
+
+    def move(self, row, col, cur_row=None, cur_col=None):
+        """@return cheapest codes to move to (row, col), 0-based from the
+        top-left corner of the terminal
+        @param cur_row, cur_col: current position, None if unknown
+        """
+        if self.dumb:
+            return self._empty
+        template, base = self._cup
+        # relative move only if terminal can move vertically
+        if (cur_row is not None and
+                self.step_cost('UP' if row < cur_row else 'DOWN',
+                               abs(row - cur_row)) != INFINITE):
+            vertical, cur_col = self._vertical(cur_row, cur_col, row, col)
+            absolute_cost = base + _digits(row + 1) + _digits(col + 1)
+            if (len(vertical) + self.horizontal_cost(cur_col, col) <=
+                    absolute_cost):
+                return vertical + self.horizontal(cur_col, col)
+        if template is None:
+            raise ValueError("Terminal isn't capable enough to move cursor "
+                             "to absolute position")
+        return tparm(self.source, template, row, col)
@@ -0,0 +1,124 @@
+"""status lines pinned at the bottom of the terminal
+
+A `Footer` limits scrolling to the lines above it (scroll region), so
+regular output written to the Term scrolls above the footer and never
+overwrites it. Footer lines are updated in place (save cursor, move to
+the line, restore cursor) in a single write, output written in between
+does not require a redraw::
+
+    footer = Footer(term)
+    for item in items:
+        term('processing %s\\n' % item)
+        footer.update('%d items done' % count)
+    footer.close()
+
+Use `add_resize_callback(footer.resize)` to keep the footer at the
+bottom when the terminal is resized. `resize` only records the new size,
+the scroll region is set and the footer redrawn on the next
+`update`/`set`/`redraw`.
+"""
+
+from .pyterm import run_resize_callbacks
+from .width import truncate
+
+
+class Footer(object):
+    """`lines` lines at the bottom of the terminal
+
+    @ivar rows: (int) number of lines on terminal
+    @ivar cols: (int) number of columns on terminal, longer lines are cut
+    @ivar texts: (list - str) content of each footer line
+    """
+    def __init__(self, term, lines=1, rows=None, cols=None):
+        if not (term['SCROLL_REGION'] and term['MOVE'] and
+                term['SAVE'] and term['RESTORE']):
+            raise ValueError("Terminal isn't capable enough to pin a footer")
+        self.term = term
+        self.lines = lines
+        self.rows = rows or term.lines() or 24
+        self.cols = cols or term.cols() or 80
+        self.texts = [''] * lines
+        self._resized = None # (rows, cols) given to resize
+        self._setup()
+
+    def _setup(self):
+        """reserve footer lines and limit scrolling to the lines above"""
+        term = self.term
+        # scroll up content to make room, keeping the cursor on its line.
+        # setting scroll region moves the cursor to the top-left corner
+        term('\n' * self.lines + term['UP'] * self.lines + term['SAVE'] +
+             term.tparm('SCROLL_REGION', 0, self.rows - self.lines - 1) +
+             term['RESTORE'])
+
+    def _apply_resize(self):
+        """set scroll region for size given to `resize`
+        @return (bool) terminal was resized
+        """
+        run_resize_callbacks()
+        if self._resized is None:
+            return False
+        rows, cols = self._resized
+        self._resized = None
+        self.rows = rows or self.term.lines() or self.rows
+        self.cols = cols or self.term.cols() or self.cols
+        self._setup()
+        return True
+
+    def _draw(self, indexes):
+        """draw given footer lines (single write)"""
+        if self._apply_resize():
+            indexes = range(self.lines)
+        term = self.term
+        top = self.rows - self.lines
+        out = [term['SAVE']]
+        for index in indexes:
+            out.append(term.tparm('MOVE', top + index, 0))
+            out.append(truncate(self.texts[index], self.cols))
+            out.append(term['NORMAL'] + term['CLEAR_EOL'])
+        out.append(term['RESTORE'])
+        term(''.join(out))
+
+    def update(self, *texts):
+        """set content of first len(texts) lines, only changed lines
+        are drawn
+        """
+        run_resize_callbacks()
+        changed = [index for index, text in enumerate(texts)
+                   if text != self.texts[index]]
+        if changed or self._resized is not None:
+            self.texts[:len(texts)] = texts
+            self._draw(changed)
+
+    def set(self, index, text):
+        """set content of line `index`"""
+        run_resize_callbacks()
+        if text != self.texts[index] or self._resized is not None:
+            self.texts[index] = text
+            self._draw((index,))
+
+    def redraw(self):
+        """draw all footer lines"""
+        self._draw(range(self.lines))
+
+    def resize(self, rows=None, cols=None):
+        """terminal was resized, scroll region is set and footer redrawn
+        on next draw (nothing is written)
+        @param rows, cols: new size (default: size of the terminal)
+        """
+        self._resized = (rows, cols)
+
+    def close(self):
+        """clear footer and restore scrolling of the whole terminal"""
+        self._apply_resize()
+        term = self.term
+        term(term['SAVE'] +
+             term.tparm('MOVE', self.rows - self.lines, 0) +
+             term['CLEAR_EOS'] +
+             term.tparm('SCROLL_REGION', 0, self.rows - 1) +
+             term['RESTORE'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -2,6 +2,7 @@
 # revision 2015-09-29
 # https://github.com/python/cpython/blob/ae77dfb3b3c68061a316faf86fc911da2c4a3d54/Lib/string.py
 
+import functools
 import _string
 
 
@@ -142,3 +143,196 @@ class Formatter:
                 obj = obj[i]
 
         return obj, first
+
+
+
+########## pyterm
+
+# max number of compiled templates kept by each ColorFormatter
+TEMPLATE_CACHE_SIZE = 256
+
+_CONVERTERS = {'s': str, 'r': repr, 'a': ascii}
+_CONVERSION_NAMES = dict((v, k) for k, v in _CONVERTERS.items())
+_NO_CODE = object()
+
+def _escape(literal):
+    """@return literal text escaped for a format string"""
+    return literal.replace('{', '{{').replace('}', '}}')
+
+
+class Template(object):
+    """a format string parsed once and bound to a set of codes
+
+    @ivar fields: sequence of tuples, one per replacement field:
+        (literal, key, code, rest, conversion, spec, prefix, suffix)
+        - literal: text before the field
+        - key: int for positional argument or str for keyword argument
+        - code: value of `key` in codes used when not given in kwargs
+        - rest: sequence of (is_attr, name) for attribute/index access
+        - conversion: function applied to value (str, repr...) or None
+        - spec: standard format_spec
+        - prefix/suffix: color codes wrapping the formatted value
+    @ivar tail: text after the last field
+    """
+    __slots__ = ('fields', 'tail')
+
+    def __init__(self, fields, tail):
+        self.fields = fields
+        self.tail = tail
+
+    def render(self, args, kwargs):
+        """@return (str) template formatted with given arguments"""
+        result = []
+        append = result.append
+        for (literal, key, code, rest, conversion,
+             spec, prefix, suffix) in self.fields:
+            if literal:
+                append(literal)
+            if key.__class__ is int:
+                obj = args[key]
+            elif key in kwargs:
+                obj = kwargs[key]
+            elif code is _NO_CODE:
+                raise KeyError(key)
+            else:
+                obj = code
+            for is_attr, name in rest:
+                obj = getattr(obj, name) if is_attr else obj[name]
+            if conversion is not None:
+                obj = conversion(obj)
+            append(prefix + format(obj, spec) + suffix)
+        append(self.tail)
+        return ''.join(result)
+
+
+class PlainTemplate(object):
+    """a format string without colors, rendered by `str.format`"""
+    __slots__ = ('format_string', '_format')
+
+    def __init__(self, format_string):
+        self.format_string = format_string
+        self._format = format_string.format
+
+    def render(self, args, kwargs):
+        """@return (str) template formatted with given arguments"""
+        return self._format(*args, **kwargs)
+
+
+class ColorFormatter(Formatter):
+    '''A Formatter that can handle extra format_spec for terminal colors
+
+    Format strings are compiled into a `Template` on first use and kept in
+    a LRU cache. Call `clear_cache` whenever the codes are modified.
+
+    RGB colors (`#rrggbb`, `BG_#rrggbb`) are supported if `colors`
+    (`pyterm.color.ColorCodes`) is given.
+    '''
+    def __init__(self, codes, colors=None):
+        self.codes = codes
+        self.colors = colors
+        self.compile = functools.lru_cache(
+            maxsize=TEMPLATE_CACHE_SIZE)(self._compile)
+
+    def clear_cache(self):
+        """discard compiled templates (codes were modified)"""
+        self.compile.cache_clear()
+
+    def _compile(self, format_string):
+        """@return (Template) or None if format_string can not be compiled
+        (format_spec with nested replacement fields).
+        A `PlainTemplate` is returned if no field uses codes
+        (no color spec, or all its codes are empty as in dumb terminals).
+        """
+        fields = []
+        literal = ''
+        auto_arg_index = 0
+        plain = True # no field uses codes
+        has_spec = False # there is a color spec
+        for literal_text, field_name, format_spec, conversion in \
+                self.parse(format_string):
+            literal += literal_text
+            if field_name is None:
+                continue
+            if '{' in format_spec:
+                return None
+
+            # handle arg indexing like Formatter._vformat
+            if field_name == '':
+                if auto_arg_index is False:
+                    raise ValueError('cannot switch from manual field '
+                                     'specification to automatic field '
+                                     'numbering')
+                field_name = str(auto_arg_index)
+                auto_arg_index += 1
+            elif field_name.isdigit():
+                if auto_arg_index:
+                    raise ValueError('cannot switch from manual field '
+                                     'specification to automatic field '
+                                     'numbering')
+                auto_arg_index = False
+
+            key, rest = _string.formatter_field_name_split(field_name)
+            code = _NO_CODE if isinstance(key, int) else \
+                   self.codes.get(key, _NO_CODE)
+            if conversion is not None:
+                try:
+                    conversion = _CONVERTERS[conversion]
+                except KeyError:
+                    raise ValueError("Unknown conversion specifier {0!s}"
+                                     .format(conversion))
+
+            parts = format_spec.split('|', 2)
+            if len(parts) == 1:
+                prefix = suffix = ''
+            else:
+                has_spec = True
+                prefix = ''.join(self.code(c) for c in parts[1].split())
+                suffix = self.codes['DEFAULT']
+            if prefix or suffix or code is not _NO_CODE:
+                plain = False
+            fields.append((literal, key, code, tuple(rest), conversion,
+                           parts[0], prefix, suffix, field_name))
+            literal = ''
+        if not plain:
+            return Template(tuple(f[:-1] for f in fields), literal)
+        if has_spec:
+            # color specs with empty codes, remove them
+            format_string = ''.join(
+                ''.join((_escape(field[0]), '{', field[-1],
+                         '' if field[4] is None else
+                         '!' + _CONVERSION_NAMES[field[4]],
+                         ':', field[5], '}'))
+                for field in fields) + _escape(literal)
+        return PlainTemplate(format_string)
+
+    def code(self, name):
+        """@return code of capability/color name or RGB color"""
+        try:
+            return self.codes[name]
+        except KeyError:
+            if '#' in name and self.colors is not None:
+                return self.colors.code(name)
+            raise
+
+    def vformat(self, format_string, args, kwargs):
+        template = self.compile(format_string)
+        if template is None:
+            return Formatter.vformat(self, format_string, args, kwargs)
+        return template.render(args, kwargs)
+
+    def format_field(self, value, format_spec):
+        parts = format_spec.split('|', 2)
+        formatted = format(value, parts[0])
+        if len(parts) == 1:
+            return formatted
+        color = ''.join(self.code(c) for c in parts[1].split())
+        return color + formatted + self.codes['DEFAULT']
+
+    def get_value(self, key, args, kwargs):
+        if isinstance(key, int):
+            return args[key]
+        else:
+            try:
+                return kwargs[key]
+            except KeyError:
+                return self.codes[key]
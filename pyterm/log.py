@@ -0,0 +1,224 @@
+"""colored logging
+
+`TermHandler` is a `logging.Handler` writing records to a `Term` with a
+style for each level. Format strings use `str.format` syntax with color
+specs (see `Term.format`), the name `LEVEL` in a color spec is replaced
+by the style of the record's level::
+
+    handler = TermHandler(Term(stream=sys.stderr))
+    logging.getLogger().addHandler(handler)
+
+`LEVEL` is replaced by the capability/color names of the level's style
+(the Term's codes are not modified, handlers sharing a Term can use
+different styles) and templates are compiled once per level. On a dumb
+terminal no codes are used at all.
+
+With a `TermListener` threads logging never touch the terminal, records
+are put on a queue (`logging.handlers.QueueHandler`) and a single thread
+writes all records taken from the queue at once::
+
+    listener = TermListener(TermHandler(term))
+    logging.getLogger().addHandler(listener.queue_handler())
+    with listener:
+        ...
+"""
+
+import string
+import logging
+import logging.handlers
+import queue
+import threading
+
+from .formatter import _escape
+
+
+DEFAULT_FORMAT = '{levelname:<8|LEVEL} {name}: {message}'
+
+LEVEL_STYLES = {
+    logging.DEBUG: ('BLUE',),
+    logging.INFO: ('GREEN',),
+    logging.WARNING: ('YELLOW',),
+    logging.ERROR: ('RED',),
+    logging.CRITICAL: ('RED', 'BOLD'),
+    }
+
+MAX_BATCH = 1000 # max number of records in a single write of TermListener
+
+_parse = string.Formatter().parse
+
+
+def _level_format(fmt, names):
+    """@return (str) fmt with name LEVEL in color specs replaced by names"""
+    out = []
+    for literal, field_name, spec, conversion in _parse(fmt):
+        out.append(_escape(literal))
+        if field_name is None:
+            continue
+        parts = spec.split('|', 1)
+        if len(parts) == 2:
+            parts[1] = ' '.join(
+                [level_name for name in parts[1].split() for level_name in
+                 (names if name == 'LEVEL' else (name,))])
+            if not parts[1]:
+                del parts[1]
+        out.append('{' + field_name +
+                   ('' if conversion is None else '!' + conversion) +
+                   ':' + '|'.join(parts) + '}')
+    return ''.join(out)
+
+
+class _FormatTemplate(object):
+    """a format string that can not be compiled, formatted on each call"""
+    __slots__ = ('formatter', 'format_string')
+
+    def __init__(self, formatter, format_string):
+        self.formatter = formatter
+        self.format_string = format_string
+
+    def render(self, args, kwargs):
+        """@return (str) format string formatted with given arguments"""
+        return self.formatter.vformat(self.format_string, args, kwargs)
+
+
+class TermFormatter(logging.Formatter):
+    """format records with a template for each level
+
+    Formatted messages do not contain codes on a dumb terminal.
+    Templates are compiled on first use, create a new formatter if
+    the Term's styles are modified.
+    """
+    def __init__(self, term, fmt=DEFAULT_FORMAT, datefmt=None,
+                 level_styles=LEVEL_STYLES):
+        """
+        @param fmt: (str) format string (`Term.format` syntax)
+        @param level_styles: (dict) key: level (int),
+                             value: (tuple - str) capability/color names
+        """
+        logging.Formatter.__init__(self, fmt, datefmt, style='{',
+                                   validate=False)
+        self.term = term
+        self.fmt = fmt
+        self._styles = {} # key: level, value: capability/color names
+        if term.code != 'dumb':
+            self._styles.update(level_styles)
+        self._templates = {} # key: level, value: Template
+
+    def _template(self, level):
+        """@return template for level"""
+        fmt = _level_format(self.fmt, self._styles.get(level, ()))
+        formatter = self.term.formatter
+        template = formatter.compile(fmt)
+        if template is None:
+            # nested replacement fields in format_spec, not compiled
+            template = _FormatTemplate(formatter, fmt)
+        self._templates[level] = template
+        return template
+
+    def formatMessage(self, record):
+        try:
+            template = self._templates[record.levelno]
+        except KeyError:
+            template = self._template(record.levelno)
+        return template.render((), record.__dict__)
+
+
+class TermHandler(logging.Handler):
+    """logging handler writing to a Term"""
+    terminator = '\n'
+
+    def __init__(self, term, level=logging.NOTSET, fmt=DEFAULT_FORMAT,
+                 datefmt=None, level_styles=LEVEL_STYLES):
+        logging.Handler.__init__(self, level)
+        self.term = term
+        self.setFormatter(TermFormatter(term, fmt, datefmt, level_styles))
+
+    def _render(self, record):
+        """@return (str) formatted record, None on error"""
+        try:
+            return self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+
+    def emit(self, record):
+        text = self._render(record)
+        if text is not None:
+            self.term(text)
+
+    def handle_batch(self, records):
+        """handle records (filtered by level and filters) in a single write
+        """
+        lines = []
+        for record in records:
+            if record.levelno >= self.level and self.filter(record):
+                text = self._render(record)
+                if text is not None:
+                    lines.append(text)
+        if lines:
+            with self.lock:
+                self.term(''.join(lines))
+
+    def flush(self):
+        with self.lock:
+            self.term.flush()
+            flush = getattr(self.term.stream, 'flush', None)
+            if flush is not None:
+                flush()
+
+
+class TermListener(object):
+    """write records from a queue to a `TermHandler` in a thread
+
+    All records in the queue are written at once (up to `max_batch`).
+    """
+    _STOP = None # put on queue to stop thread
+
+    def __init__(self, handler, log_queue=None, max_batch=MAX_BATCH):
+        """
+        @param log_queue: queue where records are put, a new
+                          `queue.SimpleQueue` if not given
+        """
+        self.handler = handler
+        self.queue = queue.SimpleQueue() if log_queue is None else log_queue
+        self.max_batch = max_batch
+        self._thread = None
+
+    def queue_handler(self):
+        """@return (logging.handlers.QueueHandler) for this listener"""
+        return logging.handlers.QueueHandler(self.queue)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run,
+                                        name='pyterm-log')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        get, get_nowait = self.queue.get, self.queue.get_nowait
+        while True:
+            records = [get()]
+            try:
+                while len(records) < self.max_batch:
+                    records.append(get_nowait())
+            except queue.Empty:
+                pass
+            stop = self._STOP in records
+            if stop:
+                records = records[:records.index(self._STOP)]
+            self.handler.handle_batch(records)
+            if stop:
+                return
+
+    def stop(self):
+        """write records in queue and stop thread"""
+        if self._thread is not None:
+            self.queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+        self.handler.flush()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
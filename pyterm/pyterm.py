@@ -24,10 +24,11 @@ Copyright (c) 2013 Eduardo Naufel Schettino
 __version__ = (0, 3, 'dev0')
 
 
+import os
 import sys
-import subprocess
+import time
 
-from .formatter import Formatter
+# `.formatter` is imported only when needed to keep `import pyterm` fast.
 
 # compatibility python2 and python3
 if sys.version_info >= (3, 0):
@@ -47,6 +48,15 @@ CAPABILITY = [
     ('DOWN', 'cud1'),
     ('LEFT', 'cub1'),
     ('RIGHT', 'cuf1'),
+    ('SAVE', 'sc'), # save cursor position
+    ('RESTORE', 'rc'), # restore saved cursor position
+    # parameterized, use `Term.tparm` (see also `Term.move_to`)
+    ('MOVE', 'cup'), # row, column
+    ('SCROLL_REGION', 'csr'), # top and bottom lines
+    ('UP_N', 'cuu'), # number of lines/columns
+    ('DOWN_N', 'cud'),
+    ('LEFT_N', 'cub'),
+    ('RIGHT_N', 'cuf'),
 
     # clear
     ('CLEAR_SCREEN', 'clear'),
@@ -64,6 +74,11 @@ CAPABILITY = [
     ('A_BG_COLOR', 'setab'),
     ]
 
+# output buffering policies (see Term.set_buffering)
+FLUSH_POLICIES = ('size', 'line', 'time', 'explicit')
+BUFFER_SIZE = 8192 # characters (bytes for BinaryTerm)
+FLUSH_INTERVAL = 0.05 # seconds
+
 ANSI_COLORS = ['BLACK', 'RED', 'GREEN', 'YELLOW',
                'BLUE', 'MAGENTA', 'CYAN', 'WHITE']
 
@@ -77,6 +92,15 @@ ANSI_CODES = [
     ('DOWN', b'B'),
     ('LEFT', b'D'),
     ('RIGHT', b'C'),
+    ('SAVE', b's'),
+    ('RESTORE', b'u'),
+    # parameters formatted with `%`, `%i`: 0-based params sent 1-based
+    ('MOVE', b'%i%d;%dH'),
+    ('SCROLL_REGION', b'%i%d;%dr'),
+    ('UP_N', b'%dA'),
+    ('DOWN_N', b'%dB'),
+    ('LEFT_N', b'%dD'),
+    ('RIGHT_N', b'%dC'),
 
     # clear
     ('CLEAR_SCREEN', b'H' + ANSI_ESC + b'2J'),
@@ -96,9 +120,14 @@ def get_codes_curses(fd):
     import curses
     curses.setupterm(None, fd)
     codes = dict((name, curses.tigetstr(code)) for name, code in CAPABILITY)
+    # fails without colors (falls back to ANSI codes)
     for index, name in enumerate(ANSI_COLORS):
         codes[name] = curses.tparm(codes['A_COLOR'], index)
         codes['BG_'+name] = curses.tparm(codes['A_BG_COLOR'], index)
+    # other capabilities not supported by the terminal are empty
+    for name, code in codes.items():
+        if code is None:
+            codes[name] = b''
     return codes
 
 def get_codes_dumb():
@@ -118,28 +147,249 @@ def get_codes_ansi():
     return codes
 
 
-class ColorFormatter(Formatter):
-    '''A Formatter that can handle extra format_spec for terminal colors'''
-    def __init__(self, term):
-        self.codes = term.codes
+def tparm(source, template, *params):
+    """@return code of parameterized capability with given params
+    @param source: (str) source of codes (curses, ansi, dumb)
+    @param template: code (str or bytes) from code table
+    """
+    if not template:
+        return template
+    if source == 'curses':
+        import curses
+        if isinstance(template, bytes):
+            return curses.tparm(template, *params)
+        return curses.tparm(template.encode('latin-1'),
+                            *params).decode('latin-1')
+    one_based = b'%i' if isinstance(template, bytes) else '%i'
+    if one_based in template:
+        template = template.replace(one_based, template[:0])
+        params = tuple(param + 1 for param in params)
+    return template % params
+
+
+# terminal size of file descriptors, key: fd, value: os.terminal_size/None
+# cleared when the terminal is resized (SIGWINCH)
+_SIZES = {}
+_RESIZE_CALLBACKS = []
+# SIGWINCH handler state: None (not installed), False (can not be
+# installed) or previous handler. resized: callbacks not called yet.
+# getsignal: (function, signal number) to check handler is still ours
+_winch = {'handler': None, 'resized': False, 'getsignal': None}
+
+def _on_winch(signum, frame):
+    """SIGWINCH handler: invalidate sizes, callbacks are called later
+    (outside of signal handler) by `run_resize_callbacks`
+    """
+    _SIZES.clear()
+    _winch['resized'] = True
+    previous = _winch['handler']
+    if callable(previous):
+        previous(signum, frame)
 
-    def format_field(self, value, format_spec):
-        parts = format_spec.split('|', 2)
-        formatted = format(value, parts[0])
-        if len(parts) == 1:
-            return formatted
-        color = ''.join(self.codes[c] for c in parts[1].split())
-        return color + formatted + self.codes['DEFAULT']
+def _install_winch_handler():
+    """@return (bool) SIGWINCH handler is installed
 
-    def get_value(self, key, args, kwargs):
-        if isinstance(key, int):
-            return args[key]
-        else:
-            try:
-                return kwargs[key]
-            except KeyError:
-                return self.codes[key]
+    If the handler was replaced (application installed its own handler)
+    sizes can not be cached anymore.
+    """
+    if _winch['handler'] is None:
+        import signal
+        try:
+            _winch['handler'] = signal.signal(signal.SIGWINCH, _on_winch)
+        except (AttributeError, ValueError):
+            # no SIGWINCH on platform or not in main thread
+            _winch['handler'] = False
+            return False
+        try:
+            # signal.getsignal converts result to an enum (slow)
+            from _signal import getsignal
+        except ImportError:
+            getsignal = signal.getsignal
+        _winch['getsignal'] = (getsignal, int(signal.SIGWINCH))
+    if _winch['handler'] is False:
+        return False
+    getsignal, signum = _winch['getsignal']
+    if getsignal(signum) is _on_winch:
+        return True
+    _SIZES.clear()
+    return False
+
+def get_terminal_size(fd):
+    """@return (os.terminal_size) or None if fd is not a terminal
+
+    Sizes are cached until the terminal is resized, if the SIGWINCH
+    handler could not be installed (or was replaced) size is always
+    read from terminal.
+    """
+    cached = _install_winch_handler()
+    if _winch['resized']:
+        run_resize_callbacks()
+    if cached:
+        try:
+            return _SIZES[fd]
+        except KeyError:
+            pass
+    try:
+        size = os.get_terminal_size(fd)
+    except OSError:
+        size = None
+    if cached:
+        _SIZES[fd] = size
+    return size
+
+def add_resize_callback(callback):
+    """call `callback()` (without arguments) when terminal is resized
+
+    Callbacks are not called in the signal handler but by
+    `run_resize_callbacks`, on next size lookup (`Term.cols()`,
+    `Term.lines()`) or `Footer` draw.
+    @return callback (so it can be used as a decorator)
+    """
+    _install_winch_handler()
+    _RESIZE_CALLBACKS.append(callback)
+    return callback
 
+def remove_resize_callback(callback):
+    """remove callback added by `add_resize_callback`"""
+    _RESIZE_CALLBACKS.remove(callback)
+
+def run_resize_callbacks():
+    """call resize callbacks if terminal was resized since last call"""
+    if _winch['resized']:
+        _winch['resized'] = False
+        for callback in list(_RESIZE_CALLBACKS):
+            callback()
+
+
+class Style(object):
+    """a sequence of capabilities/colors with its codes pre-joined
+
+    Created with `Term.style`, Styles are interned by their Term.
+    Calling a Style is the same as calling the chain of attributes,
+    `term.style('BOLD', 'RED')('x')` is the same as `term.BOLD.RED('x')`.
+
+    Note: prefix is computed on creation and updated when codes of
+    its Term are modified (`Term.codes`, `Term.set_style`).
+
+    @ivar term: (Term)
+    @ivar names: (tuple - str) capability/color names
+    @ivar prefix: (str) codes of all names joined
+    """
+    __slots__ = ('term', 'names', 'prefix')
+
+    def __init__(self, term, names):
+        self.term = term
+        self.names = names
+        self.prefix = term._EMPTY.join([term[name] for name in names])
+
+    def update(self):
+        """recompute prefix from codes (names not in codes are ignored)"""
+        codes = self.term._codes
+        self.prefix = self.term._EMPTY.join(
+            [codes.get(name, self.term._EMPTY) for name in self.names])
+
+    def __getattr__(self, key):
+        """@return (Style) this style plus given capability/color"""
+        if key[0] == '_':
+            raise AttributeError(key)
+        return self.term.style(*(self.names + (key,)))
+
+    def __call__(self, content='', flush=True):
+        """same as `Term.__call__` with style codes before content
+        @return (Term) in order to allow chaining
+        """
+        term = self.term
+        term._buffer += self.prefix
+        return term(content, flush)
+
+    def __repr__(self):
+        return '<Style %s>' % '.'.join(self.names)
+
+
+# code tables shared by all Term instances
+# key: (TERM, code, use colors, start_code, type of codes)
+# value: (code source, codes)
+_CODE_TABLES = {}
+# ColorFormatter for shared code tables, key: id(codes)
+_FORMATTERS = {}
+# ColorCodes (RGB colors) for shared code tables, key: id(codes)
+_COLOR_CODES = {}
+# Movement (cursor movement costs) for shared code tables, key: id(codes)
+_MOVEMENTS = {}
+
+class CodeTable(dict):
+    """private code table of a Term (see `Term.codes`), modifying it
+    updates compiled formats and styles of the Term
+    """
+    __slots__ = ('term',)
+
+    def __init__(self, term, codes):
+        dict.__init__(self, codes)
+        self.term = term
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.term._codes_changed()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.term._codes_changed()
+
+    def _mutator(name):
+        method = getattr(dict, name)
+        def mutate(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            self.term._codes_changed()
+            return result
+        mutate.__name__ = name
+        mutate.__doc__ = method.__doc__
+        return mutate
+
+    update = _mutator('update')
+    pop = _mutator('pop')
+    popitem = _mutator('popitem')
+    clear = _mutator('clear')
+    setdefault = _mutator('setdefault')
+    del _mutator
+
+
+# Terms with buffered output, flushed at exit (weakref.WeakSet)
+_BUFFERED = None
+
+def _flush_at_exit(term, enable):
+    """add/remove term to Terms flushed at exit"""
+    global _BUFFERED
+    if _BUFFERED is None:
+        if not enable:
+            return
+        import atexit
+        import weakref
+        _BUFFERED = weakref.WeakSet()
+        atexit.register(_flush_buffered)
+    if enable:
+        _BUFFERED.add(term)
+    else:
+        _BUFFERED.discard(term)
+
+def _flush_buffered():
+    """atexit: write pending output of buffered Terms"""
+    for term in list(_BUFFERED):
+        try:
+            term.flush()
+        except Exception:
+            pass
+
+
+# attributes set on first use by Term._resolve_codes
+_LAZY_ATTRS = frozenset(('code', '_codes', '_buffer'))
+
+
+def __getattr__(name):
+    """formatter classes are defined in `.formatter` (imported on demand)"""
+    if name in ('ColorFormatter', 'Template', 'TEMPLATE_CACHE_SIZE'):
+        from . import formatter
+        return getattr(formatter, name)
+    raise AttributeError(name)
 
 
 class Term(object):
@@ -148,10 +398,29 @@ class Term(object):
     @ivar codes: (dict) key: capability-name as exposed by API
                         value: capability-code as understood by curses
 
+    @ivar _codes: same as `codes`. Terms using the same codes share the
+                  same dict (and formatter) until `set_style` is used or
+                  `codes` is accessed, then a private copy is made.
+    @ivar _code_args: arguments used to resolve codes on first use,
+                      None after codes are resolved
     @ivar _buffer: content to be sent to terminal
+    @ivar _chunks: (list) of finished buffers waiting to be written when
+                   buffering is enabled, None when every call writes
     """
+    __slots__ = ('stream', 'code', '_codes', '_own_codes', '_code_args',
+                 '_formatter', '_styles', '_colors', '_movement',
+                 '_renderer', '_stats',
+                 '_buffer', '_chunks', '_saved_buffering',
+                 '_policy', '_pending', '_buffer_size', '_interval',
+                 '_last_flush', '__weakref__')
+
+    # empty code, codes are `str` (see BinaryTerm for `bytes`)
+    _EMPTY = ''
+
     def __init__(self, stream=None, start_code=('NORMAL',),
-                 code=None, use_colors=None):
+                 code=None, use_colors=None, buffering=None,
+                 optimize_sgr=False, buffer_size=BUFFER_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
         """
         @ivar stream: where the output will be written to (default: sys.stdout)
         @param start_code: sequence of codes to be appended to the
@@ -160,18 +429,152 @@ class Term(object):
         @param code: use 'ansi' to use ANSI codes instead of quering
                      capabilities with curses
         @param use_colors: force enable/disable use of colors codes
+        @param buffering: output buffering policy, see `set_buffering`
+        @param buffer_size, flush_interval: `size` and `interval` of
+                                            `set_buffering`
+        @param optimize_sgr: (bool) when using ANSI codes, merge and skip
+                             redundant SGR codes (see `pyterm.sgr`)
+
+        Codes are resolved on first use (see `_resolve_codes`).
         """
         self.stream = stream or sys.stdout
+        self._code_args = (code, use_colors, tuple(start_code), optimize_sgr)
+        self._own_codes = False
+        self._formatter = None
+        self._styles = None
+        self._colors = None
+        self._movement = None
+        self._renderer = None
+        self._stats = None
+        self._chunks = None
+        self._saved_buffering = None
+        self.set_buffering(buffering, buffer_size, flush_interval)
+
+    def _resolve_codes(self):
+        """set code source and codes from shared code table,
+        computing the table if not used before in this process
+        """
+        code, use_colors, start_code, optimize_sgr = self._code_args
+        colors = (use_colors is True or
+                  (use_colors is None and self.stream.isatty()))
+        key = (os.environ.get('TERM'), code, colors, start_code,
+               self._EMPTY.__class__)
+        try:
+            source, codes = _CODE_TABLES[key]
+        except KeyError:
+            source, codes = self.get_codes(code, use_colors)
+            codes = self._decode_codes(codes)
+            codes['DEFAULT'] = self._EMPTY.join([codes[a] for a in start_code])
+            _CODE_TABLES[key] = (source, codes)
         # self.code is one of: curses, ansi, dumb
-        self.code, self.codes = self.get_codes(code, use_colors)
-        self.codes = dict((k, decode(v)) for k, v in self.codes.items())
-        self.set_style('DEFAULT', start_code)
-        self._buffer = self['DEFAULT']
-        self.formatter = ColorFormatter(self)
-
+        self.code = source
+        self._codes = codes
+        self._buffer = codes['DEFAULT']
+        self._code_args = None
+        if optimize_sgr and source == 'ansi':
+            from .sgr import SgrRenderer
+            self._renderer = SgrRenderer()
+        if (source == 'dumb' and
+            getattr(self.__class__, '_base_class', self.__class__) is Term):
+            self._set_class(DumbTerm)
+
+    def _set_class(self, cls):
+        """change class of instance, keeping statistics instrumentation"""
+        if self._stats is not None:
+            from .stats import instrumented_class
+            cls = instrumented_class(cls)
+        self.__class__ = cls
+
+    def _decode_codes(self, codes):
+        """@return (dict) codes as used by Term from codes as bytes"""
+        return dict((k, decode(v)) for k, v in codes.items())
+
+    @property
+    def codes(self):
+        """(CodeTable) private copy of the code table, modifying it is
+        allowed (use `term[name]` for read-only access)
+        """
+        if not self._own_codes:
+            self.codes = self._codes
+        return self._codes
+
+    @codes.setter
+    def codes(self, codes):
+        if self._code_args is not None:
+            self._resolve_codes()
+        self._codes = CodeTable(self, codes)
+        self._own_codes = True
+        self._formatter = None
+        self._movement = None
+        self._update_styles()
+        if isinstance(self, DumbTerm):
+            # codes might not be empty anymore
+            self._set_class(Term)
+
+    @property
+    def formatter(self):
+        """(ColorFormatter) for this Term's codes, created on first use"""
+        formatter = self._formatter
+        if formatter is None:
+            from .formatter import ColorFormatter
+            codes = self._codes
+            colors = self._color_codes()
+            if self._own_codes or colors is not _COLOR_CODES.get(id(codes)):
+                formatter = ColorFormatter(codes, colors)
+            else:
+                formatter = _FORMATTERS.get(id(codes))
+                if formatter is None:
+                    formatter = ColorFormatter(codes, colors)
+                    _FORMATTERS[id(codes)] = formatter
+            self._formatter = formatter
+        return formatter
+
+    @property
+    def movement(self):
+        """(pyterm.cursor.Movement) for this Term's codes, created on
+        first use
+        """
+        movement = self._movement
+        if movement is None:
+            from .cursor import Movement
+            codes = self._codes
+            if self._own_codes:
+                movement = Movement(codes, self.code)
+            else:
+                movement = _MOVEMENTS.get(id(codes))
+                if movement is None:
+                    movement = Movement(codes, self.code)
+                    _MOVEMENTS[id(codes)] = movement
+            self._movement = movement
+        return movement
+
+    def _color_codes(self):
+        """@return (ColorCodes) for RGB colors, created on first use"""
+        colors = self._colors
+        if colors is None:
+            from .color import ColorCodes, color_depth
+            codes = self._codes
+            if not self._own_codes:
+                colors = _COLOR_CODES.get(id(codes))
+            if colors is None:
+                colors = ColorCodes(codes, color_depth(self.code), self.code)
+                if not self._own_codes:
+                    _COLOR_CODES[id(codes)] = colors
+            self._colors = colors
+        return colors
+
+    def set_color_depth(self, depth):
+        """set number of colors used for RGB colors
+        @param depth: (int) `pyterm.color.TRUECOLOR`, 256, 16, 8 or 0
+        """
+        from .color import ColorCodes
+        self._colors = ColorCodes(self._codes, depth, self.code)
+        self._formatter = None
 
     def get_codes(self, code=None, use_colors=None):
-        """select source of codes (curses, ansi, dumb) and set self.codes"""
+        """select source of codes (curses, ansi, dumb)
+        @return (str, dict) code source, codes as bytes
+        """
         if (use_colors is True or
             (use_colors is None and self.stream.isatty())):
             if code=='ansi':
@@ -189,51 +592,249 @@ class Term(object):
         """@return (bytes) code of capability/color
         @param key: (str) capability/color name
         """
-        return self.codes[key]
+        return self._codes[key]
 
     def __getattr__(self, key):
         """adds attribute code to buffer
         @return self (in order to allow chaining)
         """
-        self._buffer += self.codes[key]
+        if key in _LAZY_ATTRS and self._code_args is not None:
+            self._resolve_codes()
+            return getattr(self, key)
+        if key[0] == '_':
+            raise AttributeError(key)
+        try:
+            self._buffer += self._codes[key]
+        except KeyError:
+            raise AttributeError(key)
         return self
 
     def __call__(self, content='', flush=True):
         """adds given content & default_end to buffer, writes buffer if 'flush
         @return self (in order to allow chaining)
         """
-        self._buffer += content + self['NORMAL']
+        self._buffer += content + self._codes['NORMAL']
         if flush:
-            self.stream.write(self._buffer)
-            self._buffer = self['DEFAULT']
+            if self._chunks is None:
+                if self._renderer is None:
+                    self._write(self._buffer)
+                else:
+                    self._write(self._renderer.render(self._buffer))
+            else:
+                self._chunks.append(self._buffer)
+                self._pending += len(self._buffer)
+                if (self._pending >= self._buffer_size or
+                    (self._policy == 'line' and '\n' in content) or
+                    (self._policy == 'time' and
+                     time.time() - self._last_flush >= self._interval)):
+                    self.flush()
+            self._buffer = self._codes['DEFAULT']
         return self
 
+    def _write(self, text):
+        """write text to stream"""
+        self.stream.write(text)
+
+    def set_buffering(self, policy=None, size=BUFFER_SIZE,
+                      interval=FLUSH_INTERVAL):
+        """set output buffering policy. Pending output is flushed.
+
+        @param policy: (str) one of:
+            - None: every call with flush=True writes to stream (default)
+            - 'size': write when pending output reaches `size`
+            - 'line': write when content contains a new-line
+            - 'time': write when `interval` elapsed since last write.
+                      checked on calls, there is no timer: the last output
+                      waits for the next call, `flush` or process exit.
+            - 'explicit': write only on `flush`
+        @param size: (int) pending output written when reaching this size
+                     (in characters, bytes for BinaryTerm) for any
+                     policy but 'explicit'
+        @param interval: (float) seconds between writes for policy 'time'
+
+        Pending output of buffered Terms is written at process exit.
+        """
+        if policy is not None and policy not in FLUSH_POLICIES:
+            raise ValueError("Invalid buffering policy: %r" % (policy,))
+        if self._chunks:
+            self.flush()
+        self._policy = policy
+        self._chunks = None if policy is None else []
+        self._pending = 0
+        self._buffer_size = float('inf') if policy == 'explicit' else size
+        self._interval = interval
+        self._last_flush = time.time()
+        _flush_at_exit(self, policy is not None)
+
+    def flush(self):
+        """write all pending output to stream"""
+        if self._chunks:
+            text = ''.join(self._chunks)
+            if self._renderer is not None:
+                text = self._renderer.render(text)
+            self._write(text)
+            self._chunks = []
+            self._pending = 0
+        self._last_flush = time.time()
+
+    def __enter__(self):
+        """buffer output until the end of the `with` block.
+        If no policy is set, all output is buffered ('explicit'),
+        otherwise the current policy is kept (output may be written
+        before the end of the block).
+        """
+        if self._saved_buffering is None:
+            self._saved_buffering = []
+        self._saved_buffering.append(
+            (self._policy, self._buffer_size, self._interval))
+        if self._policy is None:
+            self.set_buffering('explicit')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        policy, size, interval = self._saved_buffering.pop()
+        self.flush()
+        if policy != self._policy:
+            self.set_buffering(policy, size, interval)
+
+    def _size(self):
+        """@return (os.terminal_size) of stream or None"""
+        try:
+            fd = self.stream.fileno()
+        except (AttributeError, ValueError, OSError):
+            return None
+        return get_terminal_size(fd)
+
+    def enable_stats(self, pre_write=(), post_write=()):
+        """start collecting output statistics (see `pyterm.stats`)
+
+        @param pre_write: sequence of `hook(term, text)` called before
+                          every write to stream
+        @param post_write: sequence of `hook(term, text, elapsed)` called
+                           after every write to stream
+        @return (TermStats)
+        """
+        from .stats import TermStats, instrumented_class
+        self._stats = TermStats(pre_write, post_write)
+        if not hasattr(self.__class__, '_base_class'):
+            self.__class__ = instrumented_class(self.__class__)
+        return self._stats
+
+    def disable_stats(self):
+        """stop collecting statistics"""
+        if self._stats is not None:
+            self.__class__ = self.__class__._base_class
+            self._stats = None
+
+    def stats(self):
+        """@return (dict) snapshot of statistics or None if not enabled"""
+        if self._stats is None:
+            return None
+        return self._stats.snapshot()
+
     def cols(self):
         """@return (int) number of columns on terminal window"""
-        if self.code != 'curses':
-            # FIXME py3.3 has a function with this functionality
-            return int(subprocess.check_output(['stty', 'size']).split()[1])
-        try:
-            import curses
-            return curses.tigetnum('cols')
-        except:
-            pass
+        size = self._size()
+        if size is not None:
+            return size.columns
+        if self.code == 'curses':
+            try:
+                import curses
+                return curses.tigetnum('cols')
+            except:
+                pass
 
     def lines(self):
         """@return (int) number of lines on terminal window"""
-        if self.code != 'curses':
-            return int(subprocess.check_output(['stty', 'size']).split()[0])
-        try:
-            import curses
-            return curses.tigetnum('lines')
-        except:
-            pass
+        size = self._size()
+        if size is not None:
+            return size.lines
+        if self.code == 'curses':
+            try:
+                import curses
+                return curses.tigetnum('lines')
+            except:
+                pass
 
     def set_style(self, name, args):
         """set/create a new capability
         mostly used to create named sequence of codes
         """
-        self.codes[name] = ''.join([(self[a]) for a in args])
+        codes = self.codes
+        codes[name] = self._EMPTY.join([codes[a] for a in args])
+
+    def _codes_changed(self):
+        """codes were modified, discard what was computed from them"""
+        if self._formatter is not None:
+            self._formatter.clear_cache()
+        self._movement = None
+        self._update_styles()
+
+    def _update_styles(self):
+        """update prefix of styles created by `style`"""
+        if self._styles:
+            for style in self._styles.values():
+                style.update()
+
+    def tparm(self, name, *params):
+        """@return code of a parameterized capability (MOVE, SCROLL_REGION)
+        @param params: (int) 0-based, as in terminfo
+        """
+        return tparm(self.code, self._codes[name], *params)
+
+    def move_to(self, row, col, cur_row=None, cur_col=None):
+        """adds cheapest codes to move cursor to (row, col), 0-based from
+        top-left corner of the terminal (see `pyterm.cursor`)
+        @param cur_row, cur_col: current cursor position if known,
+                                 relative moves are used when cheaper
+        @return self (in order to allow chaining)
+        """
+        self._buffer += self.movement.move(row, col, cur_row, cur_col)
+        return self
+
+    def move_by(self, rows, cols, cur_col=None):
+        """adds cheapest codes to move cursor relative to its position
+        @param rows: (int) lines down (up if negative)
+        @param cols: (int) columns right (left if negative)
+        @param cur_col: current column if known (allows `BOL` + offset)
+        @return self (in order to allow chaining)
+        """
+        movement = self.movement
+        if cur_col is None:
+            horizontal = movement.step('RIGHT' if cols > 0 else 'LEFT',
+                                       abs(cols))
+            self._buffer += movement.vertical(rows, True) + horizontal
+        else:
+            self._buffer += movement.relative(0, cur_col, rows,
+                                              cur_col + cols)
+        return self
+
+    def rgb(self, r, g=None, b=None, bg=False):
+        """adds code of RGB color to buffer (see `pyterm.color`)
+        @param r: (int) red or (str) color as '#rrggbb'
+        @param bg: (bool) set background color
+        @return self (in order to allow chaining)
+        """
+        colors = self._colors or self._color_codes()
+        if g is None:
+            code = colors.code('BG_' + r if bg else r)
+        else:
+            code = colors.rgb(r, g, b, bg)
+        self._buffer += code
+        return self
+
+    def style(self, *names):
+        """@return (Style) for given capability/color names.
+        Styles are interned, the same object is returned for the same names.
+        """
+        styles = self._styles
+        if styles is None:
+            styles = self._styles = {}
+        try:
+            return styles[names]
+        except KeyError:
+            style = styles[names] = Style(self, names)
+            return style
 
 
     def format(self, format_string, *args, **kwargs):
@@ -245,25 +846,56 @@ class Term(object):
         """demo colors and capabilities of your terminal """
         self.REVERSE('\n{:^56}\n'.format('ANSI COLORS'))
         for color in ANSI_COLORS:
-            getattr(self, color)("%-8s" % color)(' ')
-            getattr(self, color).BOLD('bold')(' ')
-            getattr(self, color).REVERSE('reverse')(' ')
-            getattr(self, color).UNDERLINE('underline')(' ')
-            getattr(self, color).BG_YELLOW('bg_yellow')(' ')
-            getattr(self, color).REVERSE.BOLD('bold+reverse')(' ')
+            self.style(color)("%-8s" % color)(' ')
+            self.style(color, 'BOLD')('bold')(' ')
+            self.style(color, 'REVERSE')('reverse')(' ')
+            self.style(color, 'UNDERLINE')('underline')(' ')
+            self.style(color, 'BG_YELLOW')('bg_yellow')(' ')
+            self.style(color, 'REVERSE', 'BOLD')('bold+reverse')(' ')
             self('\n')
 
-        line_fmt = "| {:15} | {:10} | {:15} |\n"
         self('\n')
         if self.code == 'curses':
-            self.BOLD.REVERSE(line_fmt.format('NAME', 'CODE', 'VALUE'))
-            for name, cap_name in CAPABILITY:
-                self(line_fmt.format(name, cap_name, escape(self[name])))
-            self.REVERSE('-' * 50 + '\n')
+            from .table import Table
+            table = Table(self, ['NAME', 'CODE', 'VALUE'],
+                          header_style=('BOLD', 'REVERSE'))
+            table.write((name, cap_name, escape(self[name]))
+                        for name, cap_name in CAPABILITY)
             self('\n')
 
 
 
+class DumbTerm(Term):
+    """Term for a dumb terminal (or not a terminal), all codes are empty
+
+    Output is the content as given, capabilities/colors are no-ops.
+    A `Term` changes its class to `DumbTerm` when its codes are resolved
+    from source 'dumb', and back to `Term` if its codes are modified.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, key):
+        """@return self, codes are empty"""
+        if key[0] != '_' and key in self._codes:
+            return self
+        raise AttributeError(key)
+
+    def __call__(self, content='', flush=True):
+        """same as `Term.__call__`
+        @return self (in order to allow chaining)
+        """
+        if self._buffer:
+            content = self._buffer + content
+            self._buffer = ''
+        if not flush:
+            self._buffer = content
+        elif self._chunks is None:
+            self._write(content)
+        else:
+            Term.__call__(self, content)
+        return self
+
+
 
 if __name__ == '__main__': # pragma: no cover
     term = Term()
@@ -0,0 +1,141 @@
+"""double-buffered virtual screen
+
+A `Screen` is a rectangular region of the terminal (a few lines starting
+at the cursor position when it is created). Content is written into a
+back buffer of cells (character + style), `present()` compares it with
+the front buffer (what is displayed) and sends only the changed runs.
+"""
+
+
+class Screen(object):
+    """a region of `lines` x `cols` cells drawn through a `Term`
+
+    @ivar term: (Term)
+    @ivar lines: (int) number of lines in region
+    @ivar cols: (int) number of columns in region
+    @ivar back: list of rows, each row a list of (char, style) cells
+                being composed by `write`
+    @ivar front: list of rows as currently displayed on the terminal
+    @ivar row, col: cursor position relative to top-left of the region.
+                    col is None when not known (after line-feed/wrap)
+    """
+    BLANK = (' ', '')
+
+    def __init__(self, term, lines, cols=None):
+        if not (term['UP'] and term['BOL'] and term['RIGHT']):
+            raise ValueError("Terminal isn't capable enough to move cursor")
+        self.term = term
+        self.lines = lines
+        self.cols = cols or term.cols() or 80
+        self.back = [[self.BLANK] * self.cols for _ in range(lines)]
+        self.front = [[self.BLANK] * self.cols for _ in range(lines)]
+        # reserve lines on terminal, cursor is left on the last line
+        term('\n' * (lines - 1))
+        self.row, self.col = lines - 1, 0
+
+
+    def write(self, row, col, text, *style):
+        """put text on back buffer (not displayed until `present`)
+        text is clipped to the region width, characters before column 0
+        or after the last column are dropped
+
+        @param style: capability/color names
+        """
+        if not 0 <= row < self.lines:
+            raise ValueError("Invalid row: %r" % row)
+        code = ''.join(self.term[name] for name in style)
+        cells = self.back[row]
+        start = max(col, 0)
+        for index, char in enumerate(text[start - col:self.cols - col],
+                                     start):
+            cells[index] = (char, code)
+
+    def clear(self):
+        """clear back buffer"""
+        for cells in self.back:
+            cells[:] = [self.BLANK] * self.cols
+
+
+    def _move(self, row, col):
+        """@return (str) cheapest codes to move cursor to given position
+        (relative moves only, see `pyterm.cursor`)
+        """
+        return self.term.movement.relative(self.row, self.col, row, col)
+
+    def _runs(self, back, front):
+        """@return list of (start, end) of changed cells in a row.
+        runs separated by a gap cheaper to re-write than to move the
+        cursor over are merged.
+        """
+        runs = []
+        start = None
+        for index in range(self.cols):
+            if back[index] != front[index]:
+                if start is None:
+                    start = index
+                end = index + 1
+            elif start is not None:
+                runs.append((start, end))
+                start = None
+        if start is not None:
+            runs.append((start, end))
+
+        move_cost = self.term.movement.horizontal_cost
+        merged = runs[:1]
+        for start, end in runs[1:]:
+            prev_start, prev_end = merged[-1]
+            if start - prev_end <= move_cost(prev_end, start):
+                merged[-1] = (prev_start, end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def present(self):
+        """send changes from back buffer to the terminal (single write)
+        @return (int) number of cells updated
+        """
+        term = self.term
+        normal = term['NORMAL']
+        clear_eol = term['CLEAR_EOL']
+        out = []
+        style = ''
+        updated = 0
+        for row in range(self.lines):
+            back = self.back[row]
+            front = self.front[row]
+            # cells after blank_from are all blank
+            blank_from = self.cols
+            while blank_from and back[blank_from - 1] == self.BLANK:
+                blank_from -= 1
+            for start, end in self._runs(back, front):
+                out.append(self._move(row, start))
+                self.row = row
+                # use clear-to-end-of-line for a trailing blank part
+                clear = (clear_eol and
+                         end - max(start, blank_from) > len(clear_eol))
+                stop = blank_from if clear else end
+                for char, code in back[start:stop]:
+                    if code != style:
+                        out.append(normal + code if style else code)
+                        style = code
+                    out.append(char)
+                if clear:
+                    if style:
+                        out.append(normal)
+                        style = ''
+                    out.append(clear_eol)
+                    self.col = max(start, blank_from)
+                    front[start:] = back[start:]
+                    updated += end - start
+                    break
+                self.col = end if end < self.cols else None
+                front[start:end] = back[start:end]
+                updated += end - start
+        if out:
+            term(''.join(out))
+        return updated
+
+    def close(self):
+        """move cursor to the line after the region"""
+        self.term(self._move(self.lines - 1, 0) + '\n')
+        self.row, self.col = self.lines - 1, 0
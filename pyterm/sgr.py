@@ -0,0 +1,161 @@
+"""minimal SGR (Select Graphic Rendition) output for ANSI terminals
+
+`SgrRenderer` keeps track of the graphic state of the terminal and
+rewrites output so that:
+
+ - a sequence of SGR codes (ESC[...m) is merged into a single code
+   (`ESC[1mESC[31m` -> `ESC[1;31m`)
+ - codes that do not change the current state are not sent
+   (`ESC[31m a ESC[m ESC[m ESC[31m b` -> `ESC[31m ab`)
+
+Codes at the end of a write are always sent, so the terminal is left
+in the expected state after every write.
+"""
+
+import re
+
+
+SGR_RUN = re.compile('((?:\x1b\\[[0-9;]*m)+)')
+SGR_PARAMS = re.compile('\x1b\\[([0-9;]*)m')
+
+# max number of entries in each SgrRenderer cache
+CACHE_SIZE = 1024
+
+# state: (attributes, foreground, background)
+# attributes: frozenset of int; fg/bg: None (default) or tuple of params
+NORMAL_STATE = (frozenset(), None, None)
+
+# param that turns off attributes
+ATTR_OFF = {21: (1,), 22: (1, 2), 23: (3,), 24: (4,), 25: (5, 6),
+            27: (7,), 28: (8,), 29: (9,)}
+
+
+def apply_sgr(state, params):
+    """@return new state after applying SGR params to state
+    or None if params are not understood (state unknown)
+    """
+    params = [int(p) if p else 0 for p in params.split(';')]
+    if state is None:
+        # unknown state is known again only after a reset
+        if params[0] != 0:
+            return None
+        state = NORMAL_STATE
+    attrs, fg, bg = state
+    index = 0
+    while index < len(params):
+        param = params[index]
+        index += 1
+        if param == 0:
+            attrs, fg, bg = NORMAL_STATE
+        elif 1 <= param <= 9:
+            attrs = attrs | frozenset((param,))
+        elif param in ATTR_OFF:
+            attrs = attrs - frozenset(ATTR_OFF[param])
+        elif 30 <= param <= 37 or 90 <= param <= 97:
+            fg = (param,)
+        elif 40 <= param <= 47 or 100 <= param <= 107:
+            bg = (param,)
+        elif param == 39:
+            fg = None
+        elif param == 49:
+            bg = None
+        elif param in (38, 48) and index < len(params):
+            # extended color: 38;5;n or 38;2;r;g;b
+            size = {5: 2, 2: 4}.get(params[index], len(params))
+            if index + size > len(params):
+                return None
+            color = tuple(params[index - 1:index + size])
+            index += size
+            if param == 38:
+                fg = color
+            else:
+                bg = color
+        else:
+            return None
+    return (attrs, fg, bg)
+
+
+def sgr_params(state):
+    """@return (list - str) params to set state from normal state"""
+    attrs, fg, bg = state
+    params = [str(a) for a in sorted(attrs)]
+    for color in (fg, bg):
+        if color is not None:
+            params.extend(str(p) for p in color)
+    return params
+
+
+def transition(current, target):
+    """@return (str) shortest SGR code to go from current to target state"""
+    if current == target:
+        return ''
+    if target == NORMAL_STATE:
+        return '\x1b[m'
+    if (current is None or current[0] - target[0] or
+            (current[1] is not None and target[1] is None) or
+            (current[2] is not None and target[2] is None)):
+        # something must be turned off, reset and set everything
+        return '\x1b[0;' + ';'.join(sgr_params(target)) + 'm'
+    params = [str(a) for a in sorted(target[0] - current[0])]
+    for cur_color, color in zip(current[1:], target[1:]):
+        if color != cur_color:
+            params.extend(str(p) for p in color)
+    return '\x1b[' + ';'.join(params) + 'm'
+
+
+class SgrRenderer(object):
+    """rewrite text with minimal SGR codes
+
+    @ivar state: graphic state of terminal (None means unknown)
+    """
+    def __init__(self):
+        self.state = None
+        self._apply = {} # cache: (state, run) -> new state
+        self._transition = {} # cache: (state, state) -> code
+
+    def _run_state(self, state, run):
+        """@return state after applying a run of SGR codes"""
+        key = (state, run)
+        try:
+            return self._apply[key]
+        except KeyError:
+            pass
+        new = state
+        for params in SGR_PARAMS.findall(run):
+            new = apply_sgr(new, params)
+        if len(self._apply) >= CACHE_SIZE:
+            self._apply.clear()
+        self._apply[key] = new
+        return new
+
+    def _code(self, current, target):
+        key = (current, target)
+        try:
+            return self._transition[key]
+        except KeyError:
+            if len(self._transition) >= CACHE_SIZE:
+                self._transition.clear()
+            code = self._transition[key] = transition(current, target)
+            return code
+
+    def render(self, text):
+        """@return text with SGR codes rewritten"""
+        out = []
+        state = self.state
+        target = state
+        for index, part in enumerate(SGR_RUN.split(text)):
+            if index % 2:
+                target = self._run_state(target, part)
+                if target is None:
+                    # not understood, send as it is
+                    out.append(part)
+                    state = None
+            elif part:
+                if target != state:
+                    out.append(self._code(state, target))
+                    state = target
+                out.append(part)
+        if target != state:
+            out.append(self._code(state, target))
+        self.state = target
+        return ''.join(out)
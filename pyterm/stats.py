@@ -0,0 +1,112 @@
+"""output statistics and write hooks for Term
+
+Instrumentation is enabled per Term with `Term.enable_stats()`, that
+changes the class of the Term to a subclass with instrumented methods,
+so a Term without statistics runs no extra code at all.
+"""
+
+import time
+
+
+class TermStats(object):
+    """counters of a Term output
+
+    Sizes are measured in the unit of the stream
+    (characters for Term, bytes for BinaryTerm: `str` content is counted
+    encoded). `codes` (`written - content`) is the size of the codes
+    actually written (merged codes with `optimize_sgr`), it is exact only
+    when no output is pending (buffered content is counted on call,
+    written on flush).
+
+    @ivar calls: (int) number of calls (writing or not)
+    @ivar writes: (int) number of writes to stream
+    @ivar flushes: (int) number of flushes of buffered output
+    @ivar content: (int) size of content given to calls
+    @ivar written: (int) size of output written (content + codes)
+    @ivar write_time: (float) seconds spent writing to stream
+    @ivar format_calls: (int) number of calls to `format`
+    @ivar format_time: (float) seconds spent on `format`
+    @ivar pre_write: (list) of callables `hook(term, text)`
+    @ivar post_write: (list) of callables `hook(term, text, elapsed)`
+    """
+    COUNTERS = ('calls', 'writes', 'flushes', 'content', 'written',
+                'write_time', 'format_calls', 'format_time')
+    __slots__ = COUNTERS + ('pre_write', 'post_write')
+
+    def __init__(self, pre_write=(), post_write=()):
+        self.pre_write = list(pre_write)
+        self.post_write = list(post_write)
+        self.reset()
+
+    def reset(self):
+        """set all counters to zero"""
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+
+    def snapshot(self):
+        """@return (dict) counters and `codes`, size of control codes"""
+        data = dict((name, getattr(self, name)) for name in self.COUNTERS)
+        data['codes'] = self.written - self.content
+        return data
+
+
+# instrumented subclasses, key: Term class
+_INSTRUMENTED = {}
+
+def instrumented_class(cls):
+    """@return subclass of cls (a Term class) collecting TermStats"""
+    try:
+        return _INSTRUMENTED[cls]
+    except KeyError:
+        pass
+
+    class Instrumented(cls):
+        # no slots, same layout so class of instance can be changed
+        __slots__ = ()
+        _base_class = cls
+
+        def __call__(self, content='', flush=True):
+            stats = self._stats
+            stats.calls += 1
+            if content.__class__ is str and self._EMPTY.__class__ is bytes:
+                # BinaryTerm: count bytes written
+                stats.content += len(content.encode(self.encoding))
+            else:
+                stats.content += len(content)
+            return cls.__call__(self, content, flush)
+
+        def _write(self, text):
+            stats = self._stats
+            if text.__class__ is bytearray:
+                # BinaryTerm buffer is cleared after write, hooks get a copy
+                text = bytes(text)
+            for hook in stats.pre_write:
+                hook(self, text)
+            size = len(text)
+            start = time.perf_counter()
+            cls._write(self, text)
+            elapsed = time.perf_counter() - start
+            stats.writes += 1
+            stats.written += size
+            stats.write_time += elapsed
+            for hook in stats.post_write:
+                hook(self, text, elapsed)
+
+        def flush(self):
+            if self._chunks:
+                self._stats.flushes += 1
+            cls.flush(self)
+
+        def format(self, format_string, *args, **kwargs):
+            stats = self._stats
+            start = time.perf_counter()
+            try:
+                return cls.format(self, format_string, *args, **kwargs)
+            finally:
+                stats.format_calls += 1
+                stats.format_time += time.perf_counter() - start
+
+    Instrumented.__name__ = cls.__name__
+    Instrumented.__qualname__ = cls.__qualname__
+    _INSTRUMENTED[cls] = Instrumented
+    return Instrumented
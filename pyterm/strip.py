@@ -0,0 +1,86 @@
+"""remove terminal escape sequences from text
+
+`strip_codes` removes escape sequences (ANSI/terminfo) from a string.
+`CodeStripper` does the same for text given in chunks, keeping only
+an unfinished sequence at the end of a chunk (at most `MAX_SEQUENCE`),
+so large outputs are processed with bounded memory::
+
+    python -m pyterm.strip < colored.log > plain.log
+
+Both `str` and `bytes` are supported.
+"""
+
+import re
+import sys
+
+
+# sequences: CSI (ESC [ ... final), OSC (ESC ] ... BEL or ESC \),
+# others (ESC intermediates final, ie: ESC ( B)
+ESCAPE_SEQUENCE = (r'\x1b(?:\[[0-?]*[ -/]*[@-~]'
+                   r'|\][^\x07\x1b]*(?:\x07|\x1b\\)'
+                   r'|[ -/]*[0-Z\\^-~])')
+# start of a sequence not finished at the end of text
+UNFINISHED_SEQUENCE = (r'\x1b(?:\[[0-?]*[ -/]*'
+                       r'|\][^\x07\x1b]*\x1b?'
+                       r'|[ -/]*)\Z')
+
+# unfinished sequences longer than this are not considered escape codes
+MAX_SEQUENCE = 256
+CHUNK_SIZE = 64 * 1024
+
+_PATTERNS = {
+    str: (re.compile(ESCAPE_SEQUENCE), re.compile(UNFINISHED_SEQUENCE),
+          '\x1b'),
+    bytes: (re.compile(ESCAPE_SEQUENCE.encode('ascii')),
+            re.compile(UNFINISHED_SEQUENCE.encode('ascii')), b'\x1b'),
+    }
+
+
+def strip_codes(text):
+    """@return text (str or bytes) without escape sequences"""
+    return _PATTERNS[text.__class__][0].sub(text[:0], text)
+
+
+class CodeStripper(object):
+    """remove escape sequences from text given in chunks
+
+    @ivar _tail: unfinished sequence from end of last chunk
+    """
+    def __init__(self):
+        self._tail = ''
+
+    def feed(self, chunk):
+        """@return (str or bytes) chunk without escape sequences,
+        an unfinished sequence at its end is kept for next chunk
+        """
+        sequence, unfinished, esc = _PATTERNS[chunk.__class__]
+        if self._tail:
+            chunk = self._tail + chunk
+        self._tail = chunk[:0]
+        start = chunk.rfind(esc, max(len(chunk) - MAX_SEQUENCE, 0))
+        if start != -1 and unfinished.match(chunk, start):
+            chunk, self._tail = chunk[:start], chunk[start:]
+        return sequence.sub(chunk[:0], chunk)
+
+    def close(self):
+        """@return unfinished sequence kept from last chunk (not a code)"""
+        tail, self._tail = self._tail, self._tail[:0]
+        return tail
+
+
+def strip_stream(src, dst, chunk_size=CHUNK_SIZE):
+    """copy file-like object src to dst without escape sequences"""
+    stripper = CodeStripper()
+    read, write = src.read, dst.write
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        write(stripper.feed(chunk))
+    tail = stripper.close()
+    if tail:
+        write(tail)
+
+
+if __name__ == '__main__': # pragma: no cover
+    strip_stream(sys.stdin.buffer, sys.stdout.buffer)
@@ -0,0 +1,149 @@
+"""streaming tables
+
+`Table` writes rows taken from an iterator. Column widths are computed
+from the first `lookahead` rows only, so the first rows are written
+right away and memory does not grow with the number of rows. Longer
+values in later rows are truncated to the column width (display width,
+see `pyterm.width`)::
+
+    table = Table(term, [Column('name', ('BOLD',)),
+                         Column('size', align='>', spec=',')])
+    table.write(rows)
+
+Rows are rendered with a compiled `Term.format` template and written in
+batches of about `batch_size` characters.
+"""
+
+import itertools
+
+from .width import width as text_width, fit
+
+
+LOOKAHEAD = 100 # number of rows used to compute column widths
+MAX_WIDTH = 40 # max computed column width
+BATCH_SIZE = 64 * 1024 # characters
+
+
+class Column(object):
+    """table column
+
+    @ivar name: (str) column header
+    @ivar style: (tuple - str) capability/color names used for values
+    @ivar align: (str) '<', '>' or '^'
+    @ivar spec: (str) format_spec used to convert values to text
+    @ivar width: (int) fixed width, None to compute from values
+    """
+    __slots__ = ('name', 'style', 'align', 'spec', 'width')
+
+    def __init__(self, name, style=(), align='<', spec='', width=None):
+        self.name = name
+        self.style = tuple(style)
+        self.align = align
+        self.spec = spec
+        self.width = width
+
+
+class Table(object):
+    """write rows (sequences of values) as a table to a Term
+
+    @ivar widths: (list - int) column widths, computed on first `write`
+    """
+    def __init__(self, term, columns, lookahead=LOOKAHEAD,
+                 max_width=MAX_WIDTH, sep=' | ', header_style=('BOLD',),
+                 batch_size=BATCH_SIZE):
+        """
+        @param columns: sequence of `Column` or column names
+        @param header_style: (tuple - str) style of header, None for
+                             no header
+        """
+        self.term = term
+        self.columns = [col if isinstance(col, Column) else Column(col)
+                        for col in columns]
+        self.lookahead = lookahead
+        self.max_width = max_width
+        self.sep = sep
+        self.header_style = header_style
+        self.batch_size = batch_size
+        self.widths = None
+        self._render = None # render function of compiled row template
+
+    def _cells(self, row):
+        """@return (list - str) values converted to text, missing values
+        at the end of a short row are empty
+        """
+        cells = [format(value, col.spec)
+                 for value, col in zip(row, self.columns)]
+        missing = len(self.columns) - len(cells)
+        if missing:
+            cells.extend([''] * missing)
+        return cells
+
+    def _layout(self, sample):
+        """compute column widths from sample (list of cells) and
+        compile row template
+        """
+        widths = []
+        for index, col in enumerate(self.columns):
+            if col.width is not None:
+                widths.append(col.width)
+                continue
+            width = (text_width(col.name) if self.header_style is not None
+                     else 0)
+            for cells in sample:
+                width = max(width, text_width(cells[index]))
+            widths.append(min(width, self.max_width))
+        self.widths = widths
+        fields = []
+        for index, col in enumerate(self.columns):
+            spec = str(index)
+            if col.style:
+                spec += ':|' + ' '.join(col.style)
+            fields.append('{' + spec + '}')
+        row_format = self.sep.replace('{', '{{').replace('}', '}}').join(
+            fields) + '\n'
+        self._render = self.term.formatter.compile(row_format).render
+
+    def _fit(self, cells):
+        """@return (list - str) cells truncated/padded to column widths"""
+        return [fit(text, width, col.align) for text, width, col
+                in zip(cells, self.widths, self.columns)]
+
+    def header(self):
+        """@return (str) header line and rule"""
+        names = self.sep.join(self._fit([col.name for col in self.columns]))
+        rule = '-+-'.join('-' * width for width in self.widths)
+        template = self.term.formatter.compile(
+            '{0:|' + ' '.join(self.header_style) + '}\n{1}\n')
+        return template.render((names, rule), {})
+
+    def write(self, rows):
+        """write rows, the header is written on the first call only"""
+        rows = iter(rows)
+        cells = self._cells
+        fit_cells = self._fit
+        out = []
+        if self.widths is None:
+            sample = [cells(row) for row in
+                      itertools.islice(rows, self.lookahead)]
+            self._layout(sample)
+            if self.header_style is not None:
+                out.append(self.header())
+            render = self._render
+            out.extend(render(fit_cells(row_cells), {})
+                       for row_cells in sample)
+            # first rows written right away
+            self.term(''.join(out))
+            out = []
+        render = self._render
+        batch_size = self.batch_size
+        size = 0
+        for row in rows:
+            line = render(fit_cells(cells(row)), {})
+            out.append(line)
+            size += len(line)
+            if size >= batch_size:
+                self.term(''.join(out))
+                out = []
+                size = 0
+        if out:
+            self.term(''.join(out))
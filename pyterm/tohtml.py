@@ -0,0 +1,303 @@
+"""convert terminal output (ANSI codes) to HTML
+
+`HtmlConverter` parses SGR codes (colors, bold...) as emitted by `Term`
+and converts text to HTML `<span>` elements in a single pass. Text can
+be given in chunks, only the SGR state and an unfinished escape sequence
+are kept between chunks. Other escape sequences (cursor movement...)
+are removed.
+
+`convert_file` converts large files using a process pool. Files are
+split in chunks at line boundaries, a first pass finds the SGR codes
+that determine the state at the end of each chunk, so each chunk can be
+converted independently starting from the correct state.
+
+    python -m pyterm.tohtml [--jobs N] [--page] [FILE] > output.html
+
+Use `HTML_STYLE` as CSS for the generated classes.
+"""
+
+import os
+import re
+import sys
+from html import escape
+
+from .color import PALETTE as RGB_PALETTE, index_rgb
+from .sgr import NORMAL_STATE, SGR_PARAMS, apply_sgr
+from .strip import ESCAPE_SEQUENCE, UNFINISHED_SEQUENCE, MAX_SEQUENCE
+
+
+CHUNK_SIZE = 4 * 1024 * 1024 # bytes, for convert_file
+# max number of entries in HtmlConverter state cache
+CACHE_SIZE = 1024
+
+# xterm colors 0-15 as CSS
+PALETTE = tuple('#%02x%02x%02x' % rgb for rgb in RGB_PALETTE)
+FOREGROUND = PALETTE[7]
+BACKGROUND = PALETTE[0]
+
+ATTR_STYLES = (
+    (1, 'font-weight: bold'),
+    (2, 'opacity: 0.6'),
+    (3, 'font-style: italic'),
+    (4, 'text-decoration: underline'),
+    (5, 'text-decoration: blink'),
+    (8, 'visibility: hidden'),
+    (9, 'text-decoration: line-through'),
+    )
+
+def _style():
+    """@return (str) CSS for classes used in converted HTML"""
+    rules = ['.pyterm { color: %s; background-color: %s; }' %
+             (FOREGROUND, BACKGROUND)]
+    rules.extend('.ansi%d { %s; }' % attr for attr in ATTR_STYLES)
+    for index, color in enumerate(PALETTE):
+        base = 30 if index < 8 else 82
+        rules.append('.ansi%d { color: %s; }' % (base + index, color))
+        rules.append('.ansi%d { background-color: %s; }' %
+                     (base + 10 + index, color))
+    # reverse video with default colors
+    rules.append('.ansi-rev-fg { color: %s; }' % BACKGROUND)
+    rules.append('.ansi-rev-bg { background-color: %s; }' % FOREGROUND)
+    return '\n'.join(rules) + '\n'
+
+HTML_STYLE = _style()
+
+PAGE_HEAD = ('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+             '<style>\n%s</style>\n</head>\n<body>\n'
+             '<pre class="pyterm">') % HTML_STYLE
+PAGE_TAIL = '</pre>\n</body>\n</html>\n'
+
+_UNFINISHED = re.compile(UNFINISHED_SEQUENCE)
+_RUN = re.compile('((?:%s)+)' % ESCAPE_SEQUENCE)
+
+
+def color_rgb(color):
+    """@return (str) CSS color of an extended color (38;5;n or 38;2;r;g;b)"""
+    if color[1] == 2:
+        return '#%02x%02x%02x' % tuple(color[2:])
+    return '#%02x%02x%02x' % index_rgb(color[2])
+
+
+def apply_params(state, params):
+    """@return state after SGR params (str), unknown params are ignored"""
+    new = apply_sgr(state, params)
+    return state if new is None else new
+
+
+def sgr_summary(text):
+    """@return (list - str) params of SGR codes in text that determine
+    the state at the end of text (from the last reset on)
+    """
+    summary = []
+    for params in SGR_PARAMS.findall(text):
+        if params.split(';', 1)[0] in ('', '0'):
+            summary = []
+        summary.append(params)
+    return summary
+
+
+class HtmlConverter(object):
+    """convert text with ANSI codes to HTML, text given in chunks
+
+    @ivar state: SGR state at the end of converted text
+    """
+    def __init__(self, state=NORMAL_STATE):
+        self.state = state
+        self._span = NORMAL_STATE # state of open span
+        self._tail = ''
+        self._tags = {} # cache, key: state, value: span start tag
+        self._states = {} # cache, key: (state, run), value: state
+
+    def _tag(self, state):
+        """@return (str) span start tag for state"""
+        try:
+            return self._tags[state]
+        except KeyError:
+            pass
+        attrs, fg, bg = state
+        classes = ['ansi%d' % attr for attr, _ in ATTR_STYLES
+                   if attr in attrs]
+        styles = []
+        colors = [(fg, 'color', 0), (bg, 'background-color', 0)]
+        if 7 in attrs:
+            colors = [(bg, 'color', -10), (fg, 'background-color', 10)]
+            if bg is None:
+                classes.append('ansi-rev-fg')
+            if fg is None:
+                classes.append('ansi-rev-bg')
+        for color, prop, delta in colors:
+            if color is None:
+                continue
+            if len(color) == 1:
+                classes.append('ansi%d' % (color[0] + delta))
+            else:
+                styles.append('%s: %s' % (prop, color_rgb(color)))
+        tag = '<span'
+        if classes:
+            tag += ' class="%s"' % ' '.join(classes)
+        if styles:
+            tag += ' style="%s"' % '; '.join(styles)
+        tag = self._tags[state] = tag + '>'
+        return tag
+
+    def _run_state(self, state, run):
+        """@return state after a run of escape sequences"""
+        key = (state, run)
+        try:
+            return self._states[key]
+        except KeyError:
+            pass
+        new = state
+        for params in SGR_PARAMS.findall(run):
+            new = apply_params(new, params)
+        if len(self._states) >= CACHE_SIZE:
+            self._states.clear()
+        self._states[key] = new
+        return new
+
+    def feed(self, text):
+        """@return (str) HTML for text, an unfinished escape sequence
+        at its end is kept for next chunk
+        """
+        if self._tail:
+            text = self._tail + text
+            self._tail = ''
+        start = text.rfind('\x1b', max(len(text) - MAX_SEQUENCE, 0))
+        if start != -1 and _UNFINISHED.match(text, start):
+            text, self._tail = text[:start], text[start:]
+        return self._convert(text)
+
+    def _convert(self, text):
+        """@return (str) HTML for text (without unfinished sequences)"""
+        out = []
+        append = out.append
+        state = self.state
+        span = self._span
+        # split on raw sequences (may contain '<', '>'), escape text only
+        for index, part in enumerate(_RUN.split(text)):
+            if index % 2:
+                state = self._run_state(state, part)
+            elif part:
+                if state != span:
+                    if span != NORMAL_STATE:
+                        append('</span>')
+                    if state != NORMAL_STATE:
+                        append(self._tag(state))
+                    span = state
+                append(escape(part, False))
+        self.state = state
+        self._span = span
+        return ''.join(out)
+
+    def close(self):
+        """@return (str) HTML for remaining text, closing open span"""
+        out = []
+        if self._tail:
+            out.append(self._convert(self._tail))
+            self._tail = ''
+        if self._span != NORMAL_STATE:
+            out.append('</span>')
+            self._span = NORMAL_STATE
+        return ''.join(out)
+
+
+def convert(text, state=NORMAL_STATE):
+    """@return (str) HTML for text with ANSI codes"""
+    converter = HtmlConverter(state)
+    return converter.feed(text) + converter.close()
+
+
+def convert_stream(src, dst, chunk_size=64 * 1024):
+    """convert text from file-like object src, writing HTML to dst"""
+    converter = HtmlConverter()
+    read, write = src.read, dst.write
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        write(converter.feed(chunk))
+    write(converter.close())
+
+
+def chunk_offsets(path, chunk_size=CHUNK_SIZE):
+    """@return (list - (int, int)) start and end offsets of chunks of
+    about chunk_size bytes, ending on a new-line
+    """
+    offsets = []
+    start = 0
+    size = os.path.getsize(path)
+    with open(path, 'rb') as fp:
+        while start < size:
+            fp.seek(start + chunk_size)
+            fp.readline()
+            end = min(fp.tell(), size)
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+
+def _read_chunk(path, start, end):
+    with open(path, 'rb') as fp:
+        fp.seek(start)
+        return fp.read(end - start).decode('utf-8', 'replace')
+
+def _chunk_summary(args):
+    """pool job: SGR summary of a chunk"""
+    return sgr_summary(_read_chunk(*args))
+
+def _convert_chunk(args):
+    """pool job: HTML of a chunk starting at given state"""
+    path, start, end, state = args
+    return convert(_read_chunk(path, start, end), state)
+
+
+def convert_file(path, dst, processes=None, chunk_size=CHUNK_SIZE):
+    """convert file at path using a pool of processes, writing HTML to dst
+
+    @param processes: (int) number of processes (default: number of CPUs)
+    """
+    import multiprocessing
+    offsets = chunk_offsets(path, chunk_size)
+    jobs = [(path, start, end) for start, end in offsets]
+    with multiprocessing.Pool(processes) as pool:
+        # state at start of each chunk
+        states = []
+        state = NORMAL_STATE
+        for summary in pool.imap(_chunk_summary, jobs):
+            states.append(state)
+            for params in summary:
+                state = apply_params(state, params)
+        jobs = [job + (state,) for job, state in zip(jobs, states)]
+        for html in pool.imap(_convert_chunk, jobs):
+            dst.write(html)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='convert terminal output (ANSI codes) to HTML')
+    parser.add_argument('file', nargs='?',
+                        help='file to convert (default: stdin)')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='convert file using N processes')
+    parser.add_argument('--page', action='store_true',
+                        help='output a complete HTML page with style')
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    if args.page:
+        out.write(PAGE_HEAD)
+    if args.file and args.jobs:
+        convert_file(args.file, out, args.jobs)
+    elif args.file:
+        with open(args.file, encoding='utf-8', errors='replace') as src:
+            convert_stream(src, out)
+    else:
+        convert_stream(sys.stdin, out)
+    if args.page:
+        out.write(PAGE_TAIL)
+    return 0
+
+
+if __name__ == '__main__': # pragma: no cover
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,120 @@
+"""background writer thread
+
+`BackgroundWriter` is a file-like object that pushes written text onto a
+bounded queue. A single thread takes everything in the queue and writes
+it to the real stream in one call, so threads writing to a `Term` never
+wait for the terminal (unless the queue is full and overflow is 'block')::
+
+    term = Term(stream=BackgroundWriter(sys.stdout))
+"""
+
+import atexit
+import threading
+import collections
+
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+
+class BackgroundWriter(object):
+    """write to a stream from a background thread
+
+    @ivar stream: stream where output is written to
+    @ivar maxsize: (int) max number of items in queue
+    @ivar overflow: (str) what to do when queue is full:
+        - block: `write` waits until writer thread takes queued items
+        - drop_oldest: discard oldest item in queue
+        - drop_newest: discard item being written
+    @ivar dropped: (int) number of items discarded
+    """
+    def __init__(self, stream, maxsize=1024, overflow='block'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Invalid overflow policy: %r" % (overflow,))
+        self.stream = stream
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._busy = False # writer thread is writing items taken from queue
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run,
+                                        name='pyterm-writer')
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, text):
+        """add text to queue
+        @return (int) len(text), also when text is dropped
+        """
+        with self._cond:
+            if self._closed:
+                raise ValueError("write to closed BackgroundWriter")
+            if len(self._queue) >= self.maxsize:
+                if self.overflow == 'block':
+                    while len(self._queue) >= self.maxsize:
+                        self._cond.wait()
+                        # closed while waiting, writer thread is gone
+                        if self._closed:
+                            raise ValueError(
+                                "write to closed BackgroundWriter")
+                elif self.overflow == 'drop_newest':
+                    self.dropped += 1
+                    return len(text)
+                else:
+                    self._queue.popleft()
+                    self.dropped += 1
+            self._queue.append(text)
+            self._cond.notify_all()
+        return len(text)
+
+    def _run(self):
+        """writer thread: write all queued items at once"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                items = list(self._queue)
+                self._queue.clear()
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                self.stream.write(''.join(items))
+                self.stream.flush()
+            except Exception as exc:
+                self._error = exc
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self):
+        """wait until all queued items are written"""
+        with self._cond:
+            while self._queue or self._busy:
+                self._cond.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """write all queued items and stop writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def isatty(self):
+        return self.stream.isatty()
+
+    def fileno(self):
+        return self.stream.fileno()
@@ -1,4 +1,87 @@
-from pyterm import Term
+import time
+import itertools
+import threading
+import multiprocessing
+
+from pyterm import Term, Screen
+from pyterm.footer import Footer
+from pyterm.width import center
+
+
+FRAME_POLICIES = ('lazy', 'timer')
+
+class FrameScheduler:
+    """
+    Calls `render(*state)` with the latest state at most `fps` times per
+    second. `update` only records the state, intermediate states are
+    never rendered.
+
+    Policies:
+      - lazy: the clock is checked on `update`, a frame is rendered by
+        the thread calling `update` (nothing is rendered while there
+        are no updates, use `flush` to render the last state)
+      - timer: a frame is rendered by a timer thread after the update.
+        `render` holds `lock`, a `Term` written by `render` is not thread
+        safe: other writes to it (from any thread) must hold `lock` too
+        while frames may be rendered.
+    """
+
+    def __init__(self, render, fps=10, policy='lazy', lock=None):
+        """
+        @param lock: lock held while rendering (default: a new RLock)
+        """
+        if policy not in FRAME_POLICIES:
+            raise ValueError("Invalid frame policy: %r" % (policy,))
+        self.render = render
+        self.interval = 1.0 / fps
+        self.policy = policy
+        self.frames = 0 #: number of rendered frames
+        self._state = None # latest state not rendered yet
+        self._next = 0 # time of next frame
+        self._timer = None
+        self.lock = threading.RLock() if lock is None else lock
+
+    def update(self, *state):
+        """record state, render it if a frame is due"""
+        self._state = state
+        if self.policy == 'lazy':
+            if time.monotonic() >= self._next:
+                self._render()
+        elif self._timer is None:
+            with self.lock:
+                if self._timer is None:
+                    delay = max(self._next - time.monotonic(), 0)
+                    self._timer = threading.Timer(delay, self._render)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def _render(self):
+        """render pending state"""
+        with self.lock:
+            # reset timer before taking state, so later updates start
+            # a new timer
+            self._timer = None
+            state, self._state = self._state, None
+            if state is not None:
+                self._next = time.monotonic() + self.interval
+                self.render(*state)
+                self.frames += 1
+
+    def cancel(self):
+        """discard pending state"""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._state = None
+
+    def flush(self):
+        """render pending state now"""
+        timer = self._timer
+        if timer is not None:
+            timer.cancel()
+        self._render()
+
 
 
 # based on http://code.activestate.com/recipes/475116/
@@ -12,21 +95,37 @@ class ProgressBar:
 
     The progress bar is colored, if the terminal supports color
     output; and adjusts to the width of the terminal.
+
+    If `fps` is given the bar is drawn at most `fps` times per second
+    (see `FrameScheduler`), the final state (100%) is always drawn.
+    With policy 'timer' the bar is drawn by another thread, hold
+    `bar.lock` for any other output to `term` while the bar is active::
+
+        with bar.lock:
+            term.RED('warning\\n')
     """
 
-    def __init__(self, term, header):
+    def __init__(self, term, header, fps=None, policy='lazy', lock=None):
         if not (term['CLEAR_EOL'] and term['UP'] and term['BOL']):
             raise ValueError("Terminal isn't capable enough -- you "
                              "should use a simpler progress dispaly.")
         self.term = term
+        self._header_style = term.style('BOLD', 'CYAN')
+        self._bracket_style = term.style('GREEN')
+        self._bar_style = term.style('GREEN', 'BOLD')
         self._header_text = header
         self.width = self.term.cols() or 75
         self.cleared = True #: true if we haven't drawn the bar yet.
+        self._frames = None
+        self.lock = threading.RLock() if lock is None else lock
+        if fps is not None:
+            self._frames = FrameScheduler(self._render, fps, policy,
+                                          self.lock)
         self.update(0, '')
 
     def header(self):
         """prints the header of the progress bar (first line)"""
-        self.term.BOLD.CYAN(self._header_text.center(self.width))('\n\n')
+        self._header_style(center(self._header_text, self.width))('\n\n')
 
     def bar(self, percent):
         """print the progress bar (second line)"""
@@ -34,10 +133,27 @@ class ProgressBar:
         progress = int(bar_width * percent)
         remaining = bar_width - progress
         self.term('%3d%%' % (percent*100))
-        self.term.GREEN('[').GREEN.BOLD('='*progress + '-'*remaining).GREEN(']\n')
+        self._bracket_style('[')
+        self._bar_style('='*progress + '-'*remaining)
+        self._bracket_style(']\n')
 
     def update(self, percent, message):
-        """ """
+        """set progress, draw it now or on next frame"""
+        frames = self._frames
+        if frames is None:
+            self._render(percent, message)
+        else:
+            frames.update(percent, message)
+            if percent >= 1:
+                frames.flush()
+
+    def flush(self):
+        """draw latest progress not drawn yet"""
+        if self._frames is not None:
+            self._frames.flush()
+
+    def _render(self, percent, message):
+        """draw bar and message"""
         if self.cleared:
             self.header()
             self.cleared = False
@@ -45,13 +161,194 @@ class ProgressBar:
         self.term.BOL.UP.CLEAR_EOL
         self.bar(percent)
         # update third line (progress message)
-        self.term.CLEAR_EOL(message.center(self.width))
+        self.term.CLEAR_EOL(center(message, self.width))
 
     def clear(self):
         """clear the last 3 lines"""
-        if not self.cleared:
-            self.term.BOL.CLEAR_EOL.UP.CLEAR_EOL.UP.CLEAR_EOL()
-            self.cleared = True
+        with self.lock:
+            if self._frames is not None:
+                self._frames.cancel()
+            if not self.cleared:
+                self.term.BOL.CLEAR_EOL.UP.CLEAR_EOL.UP.CLEAR_EOL()
+                self.cleared = True
+
+
+
+class ProgressGroup:
+    """
+    Progress of many tasks in a region of `visible` + 1 lines::
+
+        task-1     [==========----------]  50%
+        task-2     [====----------------]  20%
+        + 998 tasks  [=====---------------]  25%  (100/1000 done)
+
+    Only the first `visible` unfinished tasks are shown, the last line is
+    the aggregate of all tasks. `update` only records the new value (O(1)),
+    the region is drawn by `render` (a single write of changed cells).
+    """
+
+    def __init__(self, term, visible=10, width=None):
+        self.term = term
+        self.visible = visible
+        self.width = width or term.cols() or 75
+        self.screen = Screen(term, visible + 1, self.width)
+        self._names = []
+        self._done = []
+        self._totals = []
+        self._active = {} # unfinished tasks (insertion ordered)
+        self.total = 0 # sum of totals of all tasks
+        self.done = 0 # sum of done of all tasks
+        self.finished = 0 # number of finished tasks
+
+    def add(self, name, total=1.0):
+        """add a task
+        @return (int) task id
+        """
+        task = len(self._names)
+        self._names.append(name)
+        self._done.append(0)
+        self._totals.append(total)
+        self._active[task] = None
+        self.total += total
+        return task
+
+    def update(self, task, done):
+        """set amount done of a task"""
+        self.done += done - self._done[task]
+        self._done[task] = done
+        if done >= self._totals[task] and task in self._active:
+            del self._active[task]
+            self.finished += 1
+
+    def _bar_line(self, row, label, done, total):
+        """write label, bar and percent on screen row"""
+        percent = float(done) / total if total else 1.0
+        bar_width = max(self.width - 40, 10)
+        progress = int(bar_width * min(percent, 1.0))
+        screen = self.screen
+        screen.write(row, 0, label[:12].ljust(13))
+        screen.write(row, 13, '[', 'GREEN')
+        screen.write(row, 14, '=' * progress, 'GREEN', 'BOLD')
+        screen.write(row, 14 + progress, '-' * (bar_width - progress),
+                     'GREEN')
+        screen.write(row, 14 + bar_width, ']', 'GREEN')
+        return 15 + bar_width, percent
+
+    def render(self):
+        """draw visible tasks and aggregate"""
+        screen = self.screen
+        screen.clear()
+        shown = itertools.islice(self._active, self.visible)
+        for row, task in enumerate(shown):
+            col, percent = self._bar_line(row, self._names[task],
+                                          self._done[task], self._totals[task])
+            screen.write(row, col, '%4d%%' % (percent * 100))
+        hidden = max(len(self._active) - self.visible, 0)
+        col, percent = self._bar_line(self.visible, '+ %d tasks' % hidden,
+                                      self.done, self.total)
+        screen.write(self.visible, col, '%4d%%  (%d/%d done)' % (
+            percent * 100, self.finished, len(self._names)), 'BOLD')
+        screen.present()
+
+    def poll(self, channel):
+        """update tasks with values posted to a `ProgressChannel`"""
+        done = self._done
+        for task, value in enumerate(channel.values()):
+            if value != done[task]:
+                self.update(task, value)
+
+    def close(self):
+        """draw final state and move cursor below the region"""
+        self.render()
+        self.screen.close()
+
+
+
+class ProgressChannel:
+    """
+    Progress of tasks running in other processes, kept as shared memory
+    counters (one float per task). Workers post updates without any lock,
+    message or terminal write::
+
+        channel.update(task, done)
+
+    The channel must be given to workers on process creation
+    (`Process` args or `Pool` initargs), not as argument of a submitted job.
+    """
+
+    def __init__(self, size):
+        self._values = multiprocessing.RawArray('d', size)
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, task, done):
+        """set amount done of a task (called by worker)"""
+        self._values[task] = done
+
+    def values(self):
+        """@return (list - float) copy of amount done of all tasks"""
+        return self._values[:]
+
+
+
+class ProgressMonitor:
+    """
+    Draws a `ProgressGroup` with the progress posted to a `ProgressChannel`,
+    from a thread of the parent process (the only one writing to the
+    terminal) at most `fps` times per second::
+
+        with ProgressMonitor(group, channel):
+            pool.map(job, tasks)
+    """
+
+    def __init__(self, group, channel, fps=10):
+        self.group = group
+        self.channel = channel
+        self.interval = 1.0 / fps
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run,
+                                        name='pyterm-progress')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.group.poll(self.channel)
+            self.group.render()
+
+    def stop(self):
+        """stop drawing thread and draw final state"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.group.poll(self.channel)
+        self.group.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+
+# multiprocessing demo
+_channel = None
+
+def _init_worker(channel):
+    global _channel
+    _channel = channel
+
+def _job(task):
+    for done in range(101):
+        _channel.update(task, done)
+        time.sleep(.005)
 
 
 
@@ -59,7 +356,6 @@ if __name__ == "__main__":
     myterm = Term()
 
     # progress bar demo
-    import time
     term = Term()
     progress = ProgressBar(term, 'Processing some files')
     filenames = ['this', 'that', 'other', 'foo', 'bar', 'baz']
@@ -67,3 +363,42 @@ if __name__ == "__main__":
         progress.update(float(i)/len(filenames), 'working on %s' % filename)
         time.sleep(.5)
     progress.clear()
+
+    # progress bar updated on every item, drawn at most 20 times per second
+    total = 1000000
+    progress = ProgressBar(term, 'Processing many items', fps=20)
+    for i in range(total + 1):
+        progress.update(float(i) / total, 'item %d' % i)
+    progress.clear()
+
+    # log lines scroll above a status line pinned at the bottom,
+    # the status line is never redrawn because of the log output
+    with Footer(term) as footer:
+        for i in range(201):
+            term('log line %d\n' % i)
+            if i % 10 == 0:
+                footer.update(term.format('{:3d}% {:|GREEN BOLD}',
+                                          i // 2, '=' * (i // 4)))
+            time.sleep(.01)
+
+    # progress group demo
+    import random
+    group = ProgressGroup(term, visible=5)
+    tasks = [group.add('task-%d' % num, 100) for num in range(1000)]
+    done = [0] * len(tasks)
+    while group.finished < len(tasks):
+        for task in random.sample(tasks, 100):
+            done[task] = min(done[task] + random.randint(0, 30), 100)
+            group.update(task, done[task])
+        group.render()
+        time.sleep(.02)
+    group.close()
+
+    # progress of tasks in worker processes
+    group = ProgressGroup(term, visible=4)
+    tasks = [group.add('job-%d' % num, 100) for num in range(20)]
+    channel = ProgressChannel(len(tasks))
+    pool = multiprocessing.Pool(4, _init_worker, (channel,))
+    with ProgressMonitor(group, channel):
+        pool.map(_job, tasks)
+    pool.close()
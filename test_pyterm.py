@@ -1,4 +1,7 @@
+import os
 import sys
+
+import pytest
 try:
     from StringIO import StringIO
 except: # pragma: no cover
@@ -11,25 +14,24 @@ from pyterm.pyterm import get_codes_curses, get_codes_dumb, get_codes_ansi
 
 
 
-def pytest_funcarg__term(request):
-    def create():
-        stream = StringIO()
-        stream.fileno = lambda : 0 # fake whatever fileno
-        term = Term(stream=stream)
-        # replace real codes with <code-name>
-        for name in term.codes.keys():
-            if sys.version_info >= (3, 0):
-                term.codes[name] = '<{}>'.format(name)
-            else:  # pragma: nocover
-                term.codes[name] = '<{}>'.format(name)
-        term.codes['NORMAL'] = '<NORMAL>'
-        term.codes['DEFAULT'] = '<DEFAULT>'
-        term.codes = dict((k, v) for k, v in term.codes.items())
-        term() # flush initial streeam that contains real code
-        stream.seek(0)
-        stream.truncate(0)
-        return term
-    return request.cached_setup(setup=create, scope="function")
+@pytest.fixture
+def term():
+    stream = StringIO()
+    stream.fileno = lambda : 0 # fake whatever fileno
+    term = Term(stream=stream)
+    # replace real codes with <code-name>
+    for name in term.codes.keys():
+        if sys.version_info >= (3, 0):
+            term.codes[name] = '<{}>'.format(name)
+        else:  # pragma: nocover
+            term.codes[name] = '<{}>'.format(name)
+    term.codes['NORMAL'] = '<NORMAL>'
+    term.codes['DEFAULT'] = '<DEFAULT>'
+    term.codes = dict((k, v) for k, v in term.codes.items())
+    term() # flush initial streeam that contains real code
+    stream.seek(0)
+    stream.truncate(0)
+    return term
 
 
 def test_codes_curses():
@@ -38,6 +40,30 @@ def test_codes_curses():
         assert b'\n' == codes['DOWN']
         assert b'\x1b[34m' == codes['BLUE']
 
+def _curses_codes(term_name, code):
+    """@return result of evaluating `code` in a process with TERM set,
+    a Term using curses is available as `term`
+    """
+    import subprocess
+    script = ("import os, sys; from pyterm import Term; "
+              "term = Term(stream=open(os.devnull, 'w'), use_colors=True); "
+              "term(); sys.stdout.write(repr(%s))" % code)
+    env = dict(os.environ, TERM=term_name)
+    output = subprocess.check_output([sys.executable, '-c', script], env=env)
+    return output.decode('ascii')
+
+def test_codes_curses_missing():
+    # terminal without csr, sc, rc
+    assert "('curses', '', '')" == _curses_codes(
+        'ansi', "(term.code, term['SCROLL_REGION'], term['SAVE'])")
+
+def test_movement_curses_missing():
+    # terminal without cuu, cud, cub, cuf: single steps and cup only
+    assert "('', '', '', '', '\\x1b[C', '\\x1b[6;11H')" == _curses_codes(
+        'pcansi', "(term['UP_N'], term['DOWN_N'], term['LEFT_N'], "
+        "term['RIGHT_N'], term.movement.move(5, 1, 5, 0), "
+        "term.movement.move(5, 10, 5, 0))")
+
 def test_codes_dumb():
     codes = get_codes_dumb()
     assert b'' == codes['DOWN']
@@ -48,6 +74,12 @@ def test_codes_ansi():
     assert b'\x1b[B' == codes['DOWN']
     assert b'\x1b[34m' == codes['BLUE']
 
+def test_tparm():
+    term = Term(stream=StringIO(), code='ansi', use_colors=True)
+    assert '\x1b[3;1H' == term.tparm('MOVE', 2, 0)
+    assert '\x1b[1;20r' == term.tparm('SCROLL_REGION', 0, 19)
+    assert '' == Term(stream=StringIO()).tparm('MOVE', 2, 0)
+
 
 class TestTerm(object):
     def test_init_defaults(self):
@@ -76,9 +108,42 @@ class TestTerm(object):
         # use of ansi codes forced/no curses available
         assert 'ansi' == Term(stream=tty, code='ansi').code
         import curses
+        import pyterm.pyterm
+        # codes are computed only once, clear shared code tables
+        monkeypatch.setattr(pyterm.pyterm, '_CODE_TABLES', {})
         monkeypatch.setattr(curses, 'tparm', lambda : 5/0)
         assert 'ansi' == Term(stream=tty).code
 
+    def test_shared_codes(self):
+        stream = StringIO()
+        term1 = Term(stream=stream, code='ansi', use_colors=True)
+        term2 = Term(stream=stream, code='ansi', use_colors=True)
+        assert term1._codes is term2._codes
+        assert term1.formatter is term2.formatter
+        assert not hasattr(term1, '__dict__')
+        # set_style modifies a private copy
+        term1.set_style('BR', ['BLUE', 'BG_RED'])
+        assert term1._codes is not term2._codes
+        assert 'BR' not in term2._codes
+        assert '\x1b[34m\x1b[41m' == term1['BR']
+        # same codes, different start_code
+        term3 = Term(stream=stream, code='ansi', use_colors=True,
+                     start_code=['BOLD'])
+        assert '\x1b[1m' == term3['DEFAULT']
+        assert '\x1b[m' == term2['DEFAULT']
+
+    def test_lazy_codes(self):
+        stream = StringIO()
+        term = Term(stream=stream, use_colors=False)
+        assert term._code_args is not None
+        term('x')
+        assert term._code_args is None
+        assert 'dumb' == term.code
+        assert 'x' == stream.getvalue()
+        # formatter is also created only when used
+        from pyterm.pyterm import ColorFormatter
+        assert isinstance(term.formatter, ColorFormatter)
+
     def test_get_code(self, term):
         assert "<BLUE>" == term['BLUE']
         assert "<UP>" == term['UP']
@@ -104,6 +169,32 @@ class TestTerm(object):
         term.BR('blue-red')
         assert '<DEFAULT><BLUE><BG_RED>blue-red<NORMAL>' == term.stream.getvalue()
 
+    def test_style(self, term):
+        style = term.style('BLUE', 'BOLD')
+        assert '<BLUE><BOLD>' == style.prefix
+        assert style is term.style('BLUE', 'BOLD')
+        assert style is term.style('BLUE').BOLD
+        assert term == style('sky')
+        assert '<DEFAULT><BLUE><BOLD>sky<NORMAL>' == term.stream.getvalue()
+        style('sea', flush=False)
+        assert '<DEFAULT><BLUE><BOLD>sea<NORMAL>' == term._buffer
+        # styles are updated when codes change
+        term.set_style('BLUE', ['BG_RED'])
+        assert style is term.style('BLUE', 'BOLD')
+        assert '<BG_RED><BOLD>' == style.prefix
+        term.codes['BOLD'] = '<B>'
+        assert '<BG_RED><B>' == style.prefix
+
+    def test_modify_codes(self):
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        term.codes
+        assert '\x1b[31ma\x1b[mx' == term.format('{:|RED}x', 'a')
+        term.codes['RED'] = '<R>'
+        assert '<R>a\x1b[m' == term.format('{:|RED}', 'a')
+        assert '<R>' == term.format('{RED}')
+        term.codes.update(RED='<r>')
+        assert '<r>a\x1b[m' == term.format('{:|RED}', 'a')
+
     def test_format(self, term):
         single = term.format('Hi {:|RED} X', 'apple')
         assert 'Hi <RED>apple<DEFAULT> X' == single
@@ -114,8 +205,32 @@ class TestTerm(object):
         no_color = term.format('Hi {}', 'X')
         assert 'Hi X' == no_color
 
+    def test_format_field_access(self, term):
+        class Obj:
+            name = 'apple'
+        assert "<RED>'apple'<DEFAULT>-b" == term.format(
+            '{0.name!r:|RED}-{1[x]}', Obj, {'x': 'b'})
+        assert 'Hi  x|' == term.format('Hi {:>2}|', 'x')
+        # nested format_spec is not compiled but still works
+        assert 'Hi  x|' == term.format('Hi {:>{width}}|', 'x', width=2)
+        assert term.formatter.compile('{:>{width}}') is None
+
+    def test_format_cache(self, term):
+        template = term.formatter.compile('Hi {:|RED}')
+        assert template is term.formatter.compile('Hi {:|RED}')
+        # cache is cleared when codes change
+        term.set_style('RED', ['BLUE'])
+        assert 'Hi <BLUE>x<DEFAULT>' == term.format('Hi {:|RED}', 'x')
+
+    def test_format_errors(self, term):
+        pytest.raises(ValueError, term.format, '{} {0}', 'x')
+        pytest.raises(ValueError, term.format, '{!x}', 'x')
+        pytest.raises(KeyError, term.format, '{NOT_A_CODE}')
+
 
     def test_lines_cols(self, monkeypatch):
+        import pyterm.pyterm
+        monkeypatch.setattr(pyterm.pyterm, '_SIZES', {})
         # using curses
         tty = StringIO()
         tty.fileno = lambda : 0 # fake whatever fileno
@@ -124,16 +239,72 @@ class TestTerm(object):
         assert isinstance(term.cols(), int)
         assert isinstance(term.lines(), int)
 
-        # curses not available gets None
+        # not a terminal and curses not available gets None
+        def no_size(fd):
+            raise OSError()
+        monkeypatch.setattr(os, 'get_terminal_size', no_size)
+        monkeypatch.setattr(pyterm.pyterm, '_SIZES', {})
         import curses
         monkeypatch.setattr(curses, 'tigetnum', lambda : 5/0)
         assert None == term.cols()
         assert None == term.lines()
 
-        # uses stty
+        # uses terminal size
+        monkeypatch.setattr(os, 'get_terminal_size',
+                            lambda fd: os.terminal_size((100, 30)))
+        monkeypatch.setattr(pyterm.pyterm, '_SIZES', {})
         term2 = Term(stream=tty, code='ansi')
-        assert isinstance(term2.cols(), int)
-        assert isinstance(term2.lines(), int)
+        assert 100 == term2.cols()
+        assert 30 == term2.lines()
+
+    def test_size_cache(self, monkeypatch):
+        import signal
+        import pyterm.pyterm
+        monkeypatch.setattr(pyterm.pyterm, '_SIZES', {})
+        sizes = [(100, 30)]
+        monkeypatch.setattr(os, 'get_terminal_size',
+                            lambda fd: os.terminal_size(sizes[-1]))
+        tty = StringIO()
+        tty.fileno = lambda : 0 # fake whatever fileno
+        term = Term(stream=tty, code='ansi')
+        assert 100 == term.cols()
+        sizes.append((120, 40))
+        assert 100 == term.cols() # cached
+        # cache is cleared on SIGWINCH, callbacks are called on next
+        # size lookup (not in signal handler)
+        resized = []
+        callback = lambda: resized.append(term.cols())
+        pyterm.pyterm.add_resize_callback(callback)
+        try:
+            os.kill(os.getpid(), signal.SIGWINCH)
+            assert [] == resized
+            assert 40 == term.lines()
+            assert [120] == resized
+            pyterm.pyterm.run_resize_callbacks()
+            assert [120] == resized
+        finally:
+            pyterm.pyterm.remove_resize_callback(callback)
+
+    def test_size_cache_handler_replaced(self, monkeypatch):
+        import signal
+        import pyterm.pyterm
+        monkeypatch.setattr(pyterm.pyterm, '_SIZES', {})
+        sizes = [(100, 30)]
+        monkeypatch.setattr(os, 'get_terminal_size',
+                            lambda fd: os.terminal_size(sizes[-1]))
+        tty = StringIO()
+        tty.fileno = lambda : 0 # fake whatever fileno
+        term = Term(stream=tty, code='ansi')
+        assert 100 == term.cols()
+        # application installed its own handler, sizes are not cached
+        previous = signal.signal(signal.SIGWINCH, signal.SIG_IGN)
+        try:
+            sizes.append((120, 40))
+            assert 120 == term.cols()
+            sizes.append((90, 20))
+            assert 90 == term.cols()
+        finally:
+            signal.signal(signal.SIGWINCH, previous)
 
 
 class TestDemo(object):
@@ -143,3 +314,1246 @@ class TestDemo(object):
         tty.isatty = lambda : True
         term = Term(stream=tty)
         term.demo()
+
+
+class TestScreen(object):
+    def test_present_changes(self, term):
+        from pyterm import Screen
+        screen = Screen(term, 2, cols=10)
+        assert '<DEFAULT>\n<NORMAL>' == term.stream.getvalue()
+        term.stream.truncate(0)
+        term.stream.seek(0)
+        screen.write(0, 2, 'ab', 'RED')
+        assert 2 == screen.present()
+        assert ('<DEFAULT><UP><RIGHT><RIGHT><RED>ab<NORMAL>' ==
+                term.stream.getvalue())
+        # nothing changed, nothing written
+        assert 0 == screen.present()
+        term.stream.truncate(0)
+        term.stream.seek(0)
+        screen.write(0, 3, 'c', 'RED')
+        assert 1 == screen.present()
+        assert '<DEFAULT><LEFT><RED>c<NORMAL>' == term.stream.getvalue()
+
+    def test_present_clear_eol(self, term):
+        from pyterm import Screen
+        screen = Screen(term, 1, cols=20)
+        screen.write(0, 0, 'x' * 19)
+        screen.present()
+        term.stream.truncate(0)
+        term.stream.seek(0)
+        screen.clear()
+        screen.write(0, 0, 'ab')
+        assert 19 == screen.present()
+        assert '<DEFAULT><BOL>ab<CLEAR_EOL><NORMAL>' == term.stream.getvalue()
+
+    def test_write_clipped(self, term):
+        from pyterm import Screen
+        screen = Screen(term, 2, cols=5)
+        screen.write(0, 3, 'abc')
+        screen.write(0, 7, 'x')
+        screen.write(1, -2, 'abc')
+        assert '   ab' == ''.join(char for char, style in screen.back[0])
+        assert 'c    ' == ''.join(char for char, style in screen.back[1])
+        pytest.raises(ValueError, screen.write, 2, 0, 'a')
+        pytest.raises(ValueError, screen.write, -1, 0, 'a')
+
+    def test_not_capable(self):
+        from pyterm import Screen
+        stream = StringIO()
+        pytest.raises(ValueError, Screen, Term(stream=stream), 2, 10)
+
+
+class TestBuffering(object):
+    def test_explicit(self, term):
+        term.set_buffering('explicit')
+        term.BLUE('sky')('!')
+        assert '' == term.stream.getvalue()
+        term.flush()
+        assert ('<DEFAULT><BLUE>sky<NORMAL><DEFAULT>!<NORMAL>' ==
+                term.stream.getvalue())
+
+    def test_size(self, term):
+        term.set_buffering('size', size=30)
+        term('abc')
+        assert '' == term.stream.getvalue()
+        term('0123456789')
+        assert ('<DEFAULT>abc<NORMAL><DEFAULT>0123456789<NORMAL>' ==
+                term.stream.getvalue())
+
+    def test_line(self, term):
+        term.set_buffering('line')
+        term('abc')
+        assert '' == term.stream.getvalue()
+        term('\n')
+        assert '<DEFAULT>abc<NORMAL><DEFAULT>\n<NORMAL>' == \
+            term.stream.getvalue()
+
+    def test_time(self, term, monkeypatch):
+        import time
+        now = [100.0]
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        term.set_buffering('time', interval=1)
+        term('abc')
+        assert '' == term.stream.getvalue()
+        now[0] += 1
+        term('d')
+        assert '<DEFAULT>abc<NORMAL><DEFAULT>d<NORMAL>' == \
+            term.stream.getvalue()
+
+    def test_context_manager(self, term):
+        with term:
+            term.RED('a')
+            term('\n')
+            assert '' == term.stream.getvalue()
+        assert '<DEFAULT><RED>a<NORMAL><DEFAULT>\n<NORMAL>' == \
+            term.stream.getvalue()
+        # restore default policy
+        term('b')
+        assert term.stream.getvalue().endswith('<DEFAULT>b<NORMAL>')
+
+    def test_invalid_policy(self, term):
+        pytest.raises(ValueError, term.set_buffering, 'xxx')
+
+    def test_size_argument(self):
+        stream = StringIO()
+        term = Term(stream=stream, use_colors=False, buffering='size',
+                    buffer_size=3)
+        term('ab')
+        assert '' == stream.getvalue()
+        term('c')
+        assert 'abc' == stream.getvalue()
+
+    def test_flush_at_exit(self):
+        import subprocess
+        code = ("from pyterm import Term; "
+                "term = Term(buffering='line', use_colors=False); "
+                "term('progress 50%')")
+        output = subprocess.check_output([sys.executable, '-c', code])
+        assert b'progress 50%' == output
+
+
+def _read_all(fd, data):
+    """read fd until EOF, appending chunks to data"""
+    while True:
+        chunk = os.read(fd, 64 * 1024)
+        if not chunk:
+            return
+        data.append(chunk)
+
+
+class TestAsyncTerm(object):
+    def test_write_drain(self):
+        import asyncio
+        from pyterm.asyncterm import AsyncTerm
+        read_fd, write_fd = os.pipe()
+
+        async def main():
+            with os.fdopen(write_fd, 'w') as stream:
+                async with AsyncTerm(stream, use_colors=False) as term:
+                    assert term.transport is not None
+                    term('hello')(' world', flush=False)()
+                    await term.drain()
+                # file status flags are shared with the transport's fd
+                assert os.get_blocking(stream.fileno())
+            return os.read(read_fd, 100)
+        try:
+            assert b'hello world' == asyncio.run(main())
+        finally:
+            os.close(read_fd)
+
+    def test_backpressure(self):
+        import asyncio
+        from pyterm.asyncterm import AsyncTerm
+        read_fd, write_fd = os.pipe()
+
+        async def main():
+            with os.fdopen(write_fd, 'w') as stream:
+                term = AsyncTerm(stream, use_colors=False, limit=1024,
+                                 max_buffer=300 * 1024)
+                await term.connect()
+                # pipe is full, drain blocks until reader consumes data
+                term('x' * 200 * 1024)
+                pytest.raises(BufferError, term, 'x' * 200 * 1024)
+                drain = asyncio.ensure_future(term.drain())
+                await asyncio.sleep(0.01)
+                assert not drain.done()
+                loop = asyncio.get_running_loop()
+                total = 0
+                while total < 200 * 1024:
+                    total += len(await loop.run_in_executor(
+                        None, os.read, read_fd, 64 * 1024))
+                await drain
+                await term.close()
+        try:
+            asyncio.run(main())
+        finally:
+            os.close(read_fd)
+
+    def test_retry_after_buffer_error(self):
+        import asyncio
+        from pyterm.asyncterm import AsyncTerm
+        read_fd, write_fd = os.pipe()
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            data = []
+            with os.fdopen(write_fd, 'w') as stream:
+                term = AsyncTerm(stream, use_colors=False, limit=1024,
+                                 max_buffer=300 * 1024)
+                await term.connect()
+                reader = loop.run_in_executor(None, _read_all, read_fd,
+                                              data)
+                try:
+                    term('a' * 200 * 1024)
+                    pytest.raises(BufferError, term, 'b' * 200 * 1024)
+                    await term.drain()
+                    # rejected content is written once, by the retry
+                    term('b' * 200 * 1024)
+                finally:
+                    await term.close()
+            await reader
+            return b''.join(data)
+        try:
+            assert b'a' * 200 * 1024 + b'b' * 200 * 1024 == asyncio.run(main())
+        finally:
+            os.close(read_fd)
+
+    def test_regular_file(self, tmpdir):
+        import asyncio
+        from pyterm.asyncterm import AsyncTerm
+        path = str(tmpdir.join('out'))
+
+        async def main():
+            with open(path, 'w') as stream:
+                async with AsyncTerm(stream, use_colors=False) as term:
+                    assert term.transport is None
+                    term('hello')
+        asyncio.run(main())
+        with open(path) as stream:
+            assert 'hello' == stream.read()
+
+
+class TestBackgroundWriter(object):
+    def test_write(self):
+        from pyterm.writer import BackgroundWriter
+        stream = StringIO()
+        writer = BackgroundWriter(stream)
+        term = Term(stream=writer)
+        for num in range(100):
+            term(str(num))
+        writer.flush()
+        assert ''.join(str(n) for n in range(100)) == stream.getvalue()
+        writer.close()
+        pytest.raises(ValueError, writer.write, 'x')
+
+    def _blocked_writer(self, overflow):
+        import time
+        import threading
+        from pyterm.writer import BackgroundWriter
+        release = threading.Event()
+        class SlowStream(StringIO):
+            def write(self, text):
+                release.wait()
+                return StringIO.write(self, text)
+        stream = SlowStream()
+        writer = BackgroundWriter(stream, maxsize=2, overflow=overflow)
+        writer.write('a')
+        # wait writer thread to be blocked writing 'a'
+        while writer._queue:
+            time.sleep(0.001)
+        return writer, stream, release
+
+    def test_drop_newest(self):
+        writer, stream, release = self._blocked_writer('drop_newest')
+        for text in 'bcd':
+            writer.write(text)
+        release.set()
+        writer.close()
+        assert 'abc' == stream.getvalue()
+        assert 1 == writer.dropped
+
+    def test_drop_oldest(self):
+        writer, stream, release = self._blocked_writer('drop_oldest')
+        for text in 'bcd':
+            writer.write(text)
+        release.set()
+        writer.close()
+        assert 'acd' == stream.getvalue()
+        assert 1 == writer.dropped
+
+    def test_block(self):
+        import threading
+        writer, stream, release = self._blocked_writer('block')
+        writer.write('b')
+        writer.write('c')
+        producer = threading.Thread(target=writer.write, args=('d',))
+        producer.start()
+        producer.join(0.05)
+        assert producer.is_alive()
+        release.set()
+        producer.join()
+        writer.close()
+        assert 'abcd' == stream.getvalue()
+        assert 0 == writer.dropped
+
+    def test_block_closed(self):
+        import threading
+        writer, stream, release = self._blocked_writer('block')
+        writer.write('b')
+        writer.write('c')
+        errors = []
+        def write():
+            try:
+                writer.write('d')
+            except ValueError as exc:
+                errors.append(exc)
+        producer = threading.Thread(target=write, daemon=True)
+        producer.start()
+        producer.join(0.05)
+        assert producer.is_alive()
+        # closed while producer is blocked: write fails, not lost silently
+        closer = threading.Thread(target=writer.close, daemon=True)
+        closer.start()
+        producer.join(5)
+        assert not producer.is_alive()
+        assert 1 == len(errors)
+        release.set()
+        closer.join()
+        assert 'abc' == stream.getvalue()
+
+    def test_write_return(self):
+        from pyterm.writer import BackgroundWriter
+        writer = BackgroundWriter(StringIO(), overflow='drop_newest')
+        assert 3 == writer.write('abc')
+        writer.close()
+
+
+class TestSgrRenderer(object):
+    def test_merge_codes(self):
+        from pyterm.sgr import SgrRenderer
+        render = SgrRenderer().render
+        assert '\x1b[0;1;31mx\x1b[m' == render('\x1b[m\x1b[1m\x1b[31mx\x1b[m')
+        # state is known, no reset needed
+        assert '\x1b[1;31mx\x1b[m' == render('\x1b[m\x1b[1m\x1b[31mx\x1b[m')
+
+    def test_skip_redundant(self):
+        from pyterm.sgr import SgrRenderer
+        renderer = SgrRenderer()
+        renderer.state = renderer._run_state(None, '\x1b[m')
+        assert '\x1b[31mab\x1b[m' == renderer.render(
+            '\x1b[m\x1b[31ma\x1b[m\x1b[m\x1b[31mb\x1b[m')
+        # only changed color is sent
+        assert '\x1b[1;31ma\x1b[32mb\x1b[m' == renderer.render(
+            '\x1b[1;31ma\x1b[m\x1b[1m\x1b[32mb\x1b[m')
+        # removing an attribute requires a reset
+        assert '\x1b[1;31ma\x1b[0;31mb\x1b[m' == renderer.render(
+            '\x1b[1;31ma\x1b[m\x1b[31mb\x1b[m')
+
+    def test_unknown_codes(self):
+        from pyterm.sgr import SgrRenderer
+        renderer = SgrRenderer()
+        renderer.state = renderer._run_state(None, '\x1b[m')
+        # not understood codes are sent unchanged until a reset
+        assert '\x1b[99ma\x1b[1mb\x1b[mc' == renderer.render(
+            '\x1b[99ma\x1b[1mb\x1b[mc')
+        assert '\x1b[38;5;100ma\x1b[m' == renderer.render(
+            '\x1b[m\x1b[38;5;100ma\x1b[m')
+
+    def test_term(self):
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True,
+                    optimize_sgr=True)
+        with term:
+            term.RED('a')
+            term.RED('b')
+        term.BOLD.RED('c')
+        assert '\x1b[0;31mab\x1b[m\x1b[1;31mc\x1b[m' == stream.getvalue()
+
+
+class TestBinaryTerm(object):
+    def test_set_style_format(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        term = BinaryTerm(BytesIO(), code='ansi', use_colors=True)
+        term.set_style('RED', ['GREEN'])
+        assert '\x1b[32mx\x1b[m' == term.format('{:|RED}', 'x')
+        term.set_style('RED', ['BLUE'])
+        assert '\x1b[34mx\x1b[m' == term.format('{:|RED}', 'x')
+
+    def test_write(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        stream = BytesIO()
+        term = BinaryTerm(stream, code='ansi', use_colors=True)
+        assert b'\x1b[34m' == term['BLUE']
+        term.BLUE('sky')(b' \xc3\xa9')
+        term.style('BOLD')('x', flush=False)
+        assert b'\x1b[m\x1b[1mx\x1b[m' == term._buffer
+        term()
+        assert (b'\x1b[m\x1b[34msky\x1b[m\x1b[m \xc3\xa9\x1b[m'
+                b'\x1b[m\x1b[1mx\x1b[m\x1b[m' == stream.getvalue())
+        assert 'a \x1b[31mb\x1b[m' == term.format('a {:|RED}', 'b')
+
+    def test_write_keeps_data(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        written = []
+        class KeepStream(BytesIO):
+            def write(self, data):
+                written.append(data)
+                return len(data)
+        term = BinaryTerm(KeepStream(), use_colors=False)
+        hooked = []
+        term.enable_stats(post_write=[lambda t, data, e: hooked.append(data)])
+        term('a')('b')
+        # buffer is reused, stream and hooks keep their data
+        assert [b'a', b'b'] == written
+        assert [b'a', b'b'] == hooked
+
+    def test_buffering(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        stream = BytesIO()
+        term = BinaryTerm(stream, use_colors=False, buffering='line')
+        term('a')('b')
+        assert b'' == stream.getvalue()
+        term('\n')
+        assert b'ab\n' == stream.getvalue()
+
+    def test_text_stream(self, tmpdir):
+        from pyterm.binary import BinaryTerm
+        path = str(tmpdir.join('out'))
+        with open(path, 'w') as stream:
+            stream.write('before ')
+            term = BinaryTerm(stream, use_colors=False)
+            term('caf\xe9')
+        with open(path, 'rb') as stream:
+            assert b'before caf\xc3\xa9' == stream.read()
+
+    def test_raw_partial_write(self, monkeypatch):
+        from pyterm.binary import BinaryTerm
+        read_fd, write_fd = os.pipe()
+        real_write = os.write
+        calls = []
+        def partial_write(fd, data):
+            # write at most 3 bytes per call
+            calls.append(bytes(data))
+            return real_write(fd, data[:3])
+        try:
+            with os.fdopen(write_fd, 'w') as stream:
+                term = BinaryTerm(stream, raw=True, use_colors=False)
+                monkeypatch.setattr(os, 'write', partial_write)
+                term('0123456789')
+                monkeypatch.undo()
+                assert 4 == len(calls)
+            assert b'0123456789' == os.read(read_fd, 100)
+        finally:
+            os.close(read_fd)
+
+
+class TestStats(object):
+    def test_disabled(self, term):
+        assert term.stats() is None
+        assert Term is term.__class__
+
+    def test_stats(self, term):
+        writes = []
+        term.enable_stats(pre_write=[lambda t, text: writes.append(text)])
+        assert 'Term' == term.__class__.__name__
+        term.BLUE('sky')
+        term.format('{:|RED}', 'x')
+        with term:
+            term('a')
+            term('b')
+        stats = term.stats()
+        assert 3 == stats['calls']
+        assert 2 == stats['writes']
+        assert 1 == stats['flushes']
+        assert 5 == stats['content']
+        assert len('<DEFAULT><BLUE>sky<NORMAL>') + \
+            len('<DEFAULT>a<NORMAL><DEFAULT>b<NORMAL>') == stats['written']
+        assert stats['written'] - 5 == stats['codes']
+        assert 1 == stats['format_calls']
+        assert ['<DEFAULT><BLUE>sky<NORMAL>',
+                '<DEFAULT>a<NORMAL><DEFAULT>b<NORMAL>'] == writes
+        term.disable_stats()
+        assert Term is term.__class__
+        assert term.stats() is None
+
+    def test_post_write_binary(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        elapsed = []
+        term = BinaryTerm(BytesIO(), use_colors=False)
+        term.enable_stats(post_write=[lambda t, text, e: elapsed.append(e)])
+        term(b'abc')
+        assert 1 == len(elapsed)
+        assert 3 == term.stats()['written']
+
+    def test_binary_str_content(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        term = BinaryTerm(BytesIO(), code='ansi', use_colors=True)
+        term.enable_stats()
+        term.RED('\xe9')
+        stats = term.stats()
+        # content in bytes, as written
+        assert 2 == stats['content']
+        assert len(b'\x1b[m\x1b[31m\x1b[m') == stats['codes']
+
+
+class TestProgressGroup(object):
+    def test_group(self):
+        from sample_bar import ProgressGroup
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        group = ProgressGroup(term, visible=2, width=60)
+        tasks = [group.add('task-%d' % num, 10) for num in range(5)]
+        for task in tasks:
+            group.update(task, 5)
+        group.update(tasks[0], 10)
+        assert 30 == group.done
+        assert 1 == group.finished
+        assert [1, 2, 3, 4] == list(group._active)
+        group.render()
+        output = stream.getvalue()
+        assert 'task-1' in output
+        assert 'task-0' not in output
+        assert '+ 2 tasks' in output
+        assert '(1/5 done)' in output
+        # nothing changed, nothing written
+        size = len(stream.getvalue())
+        group.render()
+        assert size == len(stream.getvalue())
+        for task in tasks:
+            group.update(task, 10)
+        group.close()
+        assert 5 == group.finished
+
+
+class TestFrameScheduler(object):
+    def test_lazy(self, monkeypatch):
+        import sample_bar
+        now = [100.0]
+        monkeypatch.setattr(sample_bar.time, 'monotonic', lambda: now[0])
+        rendered = []
+        frames = sample_bar.FrameScheduler(rendered.append, fps=10)
+        frames.update(1)
+        frames.update(2)
+        frames.update(3)
+        assert [1] == rendered
+        now[0] += 0.1
+        frames.update(4)
+        assert [1, 4] == rendered
+        frames.update(5)
+        frames.flush()
+        frames.flush()
+        assert [1, 4, 5] == rendered
+        assert 3 == frames.frames
+        frames.update(6)
+        frames.cancel()
+        frames.flush()
+        assert [1, 4, 5] == rendered
+
+    def test_timer(self):
+        import threading
+        import sample_bar
+        rendered = []
+        event = threading.Event()
+        def render(value):
+            rendered.append(value)
+            event.set()
+        frames = sample_bar.FrameScheduler(render, fps=1000, policy='timer')
+        frames.update(1)
+        assert event.wait(5)
+        event.clear()
+        frames.update(2)
+        frames.update(3)
+        assert event.wait(5)
+        frames.flush()
+        assert [1, 3] == rendered[:2]
+        assert 3 == rendered[-1]
+
+    def test_timer_lock(self):
+        import threading
+        import sample_bar
+        rendered = []
+        event = threading.Event()
+        def render(value):
+            rendered.append(value)
+            event.set()
+        frames = sample_bar.FrameScheduler(render, fps=1000, policy='timer')
+        # no frame rendered while another writer holds the lock
+        with frames.lock:
+            frames.update(1)
+            assert not event.wait(0.05)
+            assert [] == rendered
+        assert event.wait(5)
+        assert [1] == rendered
+
+    def test_invalid_policy(self):
+        import sample_bar
+        pytest.raises(ValueError, sample_bar.FrameScheduler, None,
+                      policy='xxx')
+
+    def test_progress_bar(self, monkeypatch):
+        import sample_bar
+        now = [100.0]
+        monkeypatch.setattr(sample_bar.time, 'monotonic', lambda: now[0])
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        bar = sample_bar.ProgressBar(term, 'header', fps=10)
+        for num in range(100):
+            bar.update(num / 200.0, 'item %d' % num)
+        # only first frame (from __init__) drawn
+        assert 1 == bar._frames.frames
+        assert 'item' not in stream.getvalue()
+        bar.flush()
+        assert 'item 99' in stream.getvalue()
+        # final state always drawn
+        bar.update(1.0, 'done')
+        assert 'done' in stream.getvalue()
+        assert 3 == bar._frames.frames
+
+
+def _progress_worker(channel, task):
+    for done in range(11):
+        channel.update(task, done)
+
+class TestProgressChannel(object):
+    def test_poll(self):
+        from sample_bar import ProgressGroup, ProgressChannel
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        group = ProgressGroup(term, visible=2, width=60)
+        tasks = [group.add('task-%d' % num, 10) for num in range(3)]
+        channel = ProgressChannel(len(tasks))
+        assert 3 == len(channel)
+        channel.update(0, 10)
+        channel.update(2, 4)
+        group.poll(channel)
+        assert 14 == group.done
+        assert 1 == group.finished
+
+    def test_processes(self):
+        import multiprocessing
+        from sample_bar import ProgressGroup, ProgressChannel, ProgressMonitor
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        group = ProgressGroup(term, visible=2, width=60)
+        tasks = [group.add('task-%d' % num, 10) for num in range(3)]
+        channel = ProgressChannel(len(tasks))
+        with ProgressMonitor(group, channel, fps=100):
+            workers = [multiprocessing.Process(target=_progress_worker,
+                                               args=(channel, task))
+                       for task in tasks]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        assert 30 == group.done
+        assert 3 == group.finished
+        # output has only changed cells, check displayed aggregate line
+        last_line = ''.join(char for char, style in group.screen.front[-1])
+        assert '100%  (3/3 done)' in last_line
+
+
+class TestDumbTerm(object):
+    def test_class(self):
+        from pyterm.pyterm import DumbTerm
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb')
+        term.BOLD.RED('a', flush=False).UNDERLINE('b')
+        assert isinstance(term, DumbTerm)
+        assert 'ab' == stream.getvalue()
+        pytest.raises(AttributeError, getattr, term, 'NOT_A_CODE')
+        # not dumb for other codes
+        assert Term(stream=stream, code='ansi', use_colors=True).__class__ \
+            is Term
+
+    def test_codes_modified(self):
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb')
+        term.codes['BOLD'] = '<b>'
+        assert term.__class__ is Term
+        term.BOLD('x')
+        assert '<b>x' == stream.getvalue()
+
+    def test_buffering(self):
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb', buffering='explicit')
+        term.RED('a')('b')
+        assert '' == stream.getvalue()
+        term.flush()
+        assert 'ab' == stream.getvalue()
+
+    def test_stats(self):
+        from pyterm.pyterm import DumbTerm
+        term = Term(stream=StringIO(), code='dumb')
+        term.enable_stats()
+        term.RED('abc')
+        assert isinstance(term, DumbTerm)
+        assert 1 == term.stats()['writes']
+        term.disable_stats()
+        assert term.__class__ is DumbTerm
+
+
+class TestPlainTemplate(object):
+    def test_no_color(self):
+        from pyterm.formatter import PlainTemplate
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        template = term.formatter.compile('{} {x:>3}')
+        assert isinstance(template, PlainTemplate)
+        assert '1   2' == term.format('{} {x:>3}', 1, x=2)
+        # code names are not plain
+        assert not isinstance(term.formatter.compile('{RED}x'),
+                              PlainTemplate)
+
+    def test_dumb(self):
+        from pyterm.formatter import PlainTemplate
+        term = Term(stream=StringIO(), code='dumb')
+        fmt = '{{x}} {0:>3|BOLD} {0!r:|RED} {y.real:|GREEN} {RED}'
+        assert isinstance(term.formatter.compile('{:|RED}'), PlainTemplate)
+        assert '{x}   1 1 2 ' == term.format(fmt, 1, y=2)
+
+
+class TestStrip(object):
+    TEXT = ('\x1b[1m\x1b[31mred\x1b(B\x1b[m plain\x1b]0;title\x07 '
+            '\x1b[38;5;208mx\x1b[m\x1b[K\x1b7y\x1b8')
+
+    def test_strip_codes(self):
+        from pyterm.strip import strip_codes
+        assert 'red plain xy' == strip_codes(self.TEXT)
+        assert b'red plain xy' == strip_codes(self.TEXT.encode('utf-8'))
+
+    def test_chunks(self):
+        from pyterm.strip import CodeStripper
+        for size in range(1, 8):
+            stripper = CodeStripper()
+            chunks = [self.TEXT[i:i+size]
+                      for i in range(0, len(self.TEXT), size)]
+            out = ''.join(stripper.feed(c) for c in chunks)
+            assert 'red plain xy' == out + stripper.close()
+
+    def test_unfinished(self):
+        from pyterm.strip import CodeStripper
+        stripper = CodeStripper()
+        assert b'abc' == stripper.feed(b'abc\x1b[1')
+        assert b'\x1b[1' == stripper.close()
+
+    def test_stream(self):
+        from io import BytesIO
+        from pyterm.strip import strip_stream
+        dst = BytesIO()
+        strip_stream(BytesIO(self.TEXT.encode('utf-8') * 100), dst,
+                     chunk_size=7)
+        assert b'red plain xy' * 100 == dst.getvalue()
+
+
+class TestHtml(object):
+    def test_convert(self):
+        from pyterm.tohtml import convert
+        text = ('a\x1b[1m\x1b[31mred<\x1b(B\x1b[m \x1b[7mrev\x1b[m '
+                '\x1b[38;5;208mo\x1b[m\x1b[K')
+        assert ('a<span class="ansi1 ansi31">red&lt;</span> '
+                '<span class="ansi-rev-fg ansi-rev-bg">rev</span> '
+                '<span style="color: #ff8700">o</span>') == convert(text)
+
+    def test_private_sequences(self):
+        from pyterm.tohtml import convert
+        # sequences with '<', '>' are removed, not escaped as text
+        assert ('a&lt;<span class="ansi1">b&amp;</span>c' ==
+                convert('a<\x1b[>4;1m\x1b[<u\x1b[1mb&\x1b[m\x1b[>4mc'))
+
+    def test_term_output(self):
+        from pyterm.tohtml import convert
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        term.BOLD.BLUE('x')(' ').BG_GREEN('y')
+        assert ('<span class="ansi1 ansi34">x</span> '
+                '<span class="ansi42">y</span>') == convert(stream.getvalue())
+
+    def test_chunks(self):
+        from pyterm.tohtml import HtmlConverter, convert
+        text = 'a\x1b[1;31mb\x1b[32mc\x1b[0md\x1b]0;title\x07e\x1b[4mf'
+        expected = convert(text)
+        for size in range(1, 6):
+            converter = HtmlConverter()
+            out = ''.join(converter.feed(text[i:i+size])
+                          for i in range(0, len(text), size))
+            assert expected == out + converter.close()
+
+    def test_summary(self):
+        from pyterm.tohtml import sgr_summary
+        assert [] == sgr_summary('abc')
+        assert ['1', '31'] == sgr_summary('\x1b[1mx\x1b[31m')
+        assert ['0;4', '32'] == sgr_summary('\x1b[1m\x1b[0;4m\x1b[32m')
+        assert ['', '1'] == sgr_summary('\x1b[35m\x1b[m\x1b[1m')
+
+    def test_file(self, tmpdir):
+        import re
+        from pyterm.tohtml import convert, convert_file
+        lines = ['line %d \x1b[%dm<color>\n' % (num, 30 + num % 8)
+                 for num in range(200)]
+        path = tmpdir.join('log.txt')
+        path.write(''.join(lines))
+        out = StringIO()
+        convert_file(str(path), out, processes=2, chunk_size=100)
+        html = out.getvalue()
+        # chunks close and re-open spans, same text and colors
+        strip_tags = lambda text: re.sub('<[^>]*>', '', text)
+        assert strip_tags(convert(''.join(lines))) == strip_tags(html)
+        line_class = re.findall(
+            r'class="ansi(\d+)">(?:[^<]*\n)?line (\d+)', html)
+        assert 199 == len(line_class)
+        for color, num in line_class:
+            assert int(color) == 30 + (int(num) - 1) % 8
+
+
+class TestTable(object):
+    def test_write(self):
+        from pyterm.table import Table, Column
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb')
+        table = Table(term, ['name', Column('size', align='>', spec=',')],
+                      lookahead=2)
+        table.write([('a', 1), ('bbb', 1000), ('long name', 10)])
+        assert [4, 5] == table.widths
+        assert ('name |  size\n'
+                '-----+------\n'
+                'a    |     1\n'
+                'bbb  | 1,000\n'
+                'long |    10\n') == stream.getvalue()
+        # header written only once
+        table.write([('c', 2)])
+        assert stream.getvalue().endswith('long |    10\nc    |     2\n')
+
+    def test_style(self):
+        from pyterm.table import Table, Column
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        table = Table(term, [Column('x', ('RED',))], header_style=None)
+        table.write([('a',)])
+        assert '\x1b[m\x1b[31ma\x1b[m\n\x1b[m' == stream.getvalue()
+
+    def test_short_row(self):
+        from pyterm.table import Table
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb')
+        table = Table(term, ['a', 'b'], header_style=None)
+        table.write([(1, 2), (3,)])
+        table.write([()])
+        assert '1 | 2\n3 |  \n  |  \n' == stream.getvalue()
+
+    def test_header_rgb(self):
+        from pyterm.table import Table
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        term.set_color_depth(256)
+        table = Table(term, ['a'], header_style=('#ff0000', 'BOLD'))
+        table.write([('x',)])
+        assert ('\x1b[m\x1b[38;5;196m\x1b[1ma\x1b[m\n-\nx\n\x1b[m' ==
+                stream.getvalue())
+
+    def test_batch(self):
+        from pyterm.table import Table
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb')
+        writes = []
+        term.enable_stats(post_write=[lambda t, text, e: writes.append(text)])
+        table = Table(term, ['n'], lookahead=10, batch_size=100)
+        table.write((num,) for num in range(1000))
+        # lookahead rows, then batches of 100 chars
+        assert 10 == writes[0].count('\n') - 2
+        assert all(len(text) < 110 for text in writes[1:])
+        assert 1000 + 2 == stream.getvalue().count('\n')
+
+
+class TestWidth(object):
+    def test_width(self):
+        from pyterm.width import width, char_width
+        assert 3 == width('abc')
+        assert 6 == width('日本語')
+        assert 1 == width('é') # combining accent
+        assert 2 == width('\U0001f44d') # emoji
+        assert 4 == width('\x1b[31m日本\x1b[m')
+        assert 5 == width('\x1b[1mhello\x1b[m')
+        assert 0 == char_width('​')
+        assert 1 == char_width('é')
+
+    def test_pad(self):
+        from pyterm.width import pad, center
+        assert '日  ' == pad('日', 4)
+        assert '  日' == pad('日', 4, '>')
+        assert ' 日 ' == center('日', 4)
+        assert '\x1b[31mx\x1b[m  ' == pad('\x1b[31mx\x1b[m', 3)
+        for text in ('', 'a', 'ab', 'abc'):
+            for columns in range(6):
+                assert text.center(columns) == center(text, columns)
+
+    def test_truncate(self):
+        from pyterm.width import truncate, fit
+        assert 'abc' == truncate('abc', 3)
+        assert 'a.' == truncate('abc', 2, '.')
+        assert '日' == truncate('日本', 3)
+        # codes after cut are kept
+        assert '\x1b[31m日\x1b[m' == truncate('\x1b[31m日本\x1b[m',
+                                                 2)
+        assert '日 ' == fit('日本', 3)
+        assert 'ab ' == fit('ab', 3)
+
+    def test_wrap(self):
+        from pyterm.width import wrap
+        assert ['hello', 'world'] == wrap('hello world', 8)
+        assert ['a b', 'c'] == wrap('a b c', 3)
+        assert ['abcd', 'ef'] == wrap('abcdef', 4)
+        assert ['日本', '語'] == wrap('日本語', 5)
+        assert [''] == wrap('', 4)
+
+    def test_wrap_narrow(self):
+        from pyterm.width import wrap
+        # characters wider than columns, one per line
+        assert ['日', '本'] == wrap('日本', 1)
+        assert ['a', '日', 'b'] == wrap('a日b', 1)
+        pytest.raises(ValueError, wrap, 'abc def', 0)
+
+    def test_table(self):
+        from pyterm.table import Table
+        stream = StringIO()
+        term = Term(stream=stream, code='dumb')
+        Table(term, ['a', 'b']).write([('日本', 'x'), ('y', 'z')])
+        assert ('a    | b\n'
+                '-----+--\n'
+                '日本 | x\n'
+                'y    | z\n') == stream.getvalue()
+
+
+class TestColor(object):
+    def test_nearest(self):
+        from pyterm.color import nearest_256, nearest_palette, index_rgb
+        assert 208 == nearest_256(255, 136, 0)
+        assert 16 == nearest_256(0, 0, 0)
+        assert 244 == nearest_256(128, 128, 128) # gray ramp
+        assert (255, 135, 0) == index_rgb(208)
+        assert 3 == nearest_palette(255, 136, 0, 8) # yellow
+        assert 9 == nearest_palette(255, 0, 0, 16)
+        assert 1 == nearest_palette(255, 0, 0, 8)
+
+    def test_parse(self):
+        from pyterm.color import parse_rgb
+        assert (255, 136, 0) == parse_rgb('#ff8800')
+        assert (255, 136, 0) == parse_rgb('#f80')
+        pytest.raises(ValueError, parse_rgb, '#ff88')
+
+    def test_rgb(self):
+        from pyterm.color import TRUECOLOR
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        term.set_color_depth(TRUECOLOR)
+        term.rgb(255, 136, 0)('a').rgb('#0000ff', bg=True)('b')
+        assert ('\x1b[m\x1b[38;2;255;136;0ma\x1b[m'
+                '\x1b[m\x1b[48;2;0;0;255mb\x1b[m') == stream.getvalue()
+
+    def test_depth(self):
+        from pyterm.color import TRUECOLOR
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        expected = {
+            TRUECOLOR: '\x1b[38;2;255;136;0mx\x1b[m',
+            256: '\x1b[38;5;208mx\x1b[m',
+            16: '\x1b[33mx\x1b[m',
+            0: 'x\x1b[m',
+            }
+        for depth, output in expected.items():
+            term.set_color_depth(depth)
+            assert output == term.format('{:|#ff8800}', 'x')
+        term.set_color_depth(256)
+        assert '\x1b[48;5;196m\x1b[1mx\x1b[m' == \
+            term.format('{:|BG_#ff0000 BOLD}', 'x')
+
+    def test_env(self, monkeypatch):
+        from pyterm.color import color_depth, TRUECOLOR
+        monkeypatch.setenv('COLORTERM', 'truecolor')
+        assert TRUECOLOR == color_depth('ansi')
+        assert 0 == color_depth('dumb')
+        monkeypatch.delenv('COLORTERM')
+        monkeypatch.setenv('TERM', 'xterm-256color')
+        assert 256 == color_depth('ansi')
+        monkeypatch.setenv('TERM', 'vt100')
+        assert 8 == color_depth('ansi')
+
+    def test_binary(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        term = BinaryTerm(stream=BytesIO(), code='ansi', use_colors=True)
+        term.set_color_depth(256)
+        term.rgb(255, 0, 0)('x')
+        assert b'\x1b[m\x1b[38;5;196mx\x1b[m' == term.stream.getvalue()
+        assert '\x1b[38;5;196mx\x1b[m' == term.format('{:|#ff0000}', 'x')
+
+
+class TestChart(object):
+    def test_scale(self):
+        from pyterm.chart import ColorScale
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        scale = ColorScale(term, ['BG_BLUE', 'BG_GREEN', 'BG_RED'], 0, 3)
+        assert ['\x1b[44m', '\x1b[42m', '\x1b[41m', '\x1b[41m'] == \
+            [scale.code(v) for v in (-1, 1, 2.5, 10)]
+        assert ['\x1b[44m', '\x1b[41m'] == scale.map([0, 3])
+        term.set_color_depth(256)
+        scale = ColorScale(term, ('#000000', '#ffffff'), 0, 1, steps=3)
+        assert ['\x1b[48;5;16m', '\x1b[48;5;244m', '\x1b[48;5;231m'] == \
+            scale.codes
+
+    def test_heatmap(self):
+        import array
+        from pyterm.chart import ColorScale, heatmap
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        term.enable_stats()
+        scale = ColorScale(term, ['BG_BLUE', 'BG_RED'], 0, 2)
+        heatmap(term, array.array('i', [0, 0, 1, 1, 1, 0]), scale, ' ',
+                width=3)
+        # one write per row, one code per run
+        assert 2 == term.stats()['writes']
+        assert ('\x1b[m\x1b[44m  \x1b[41m \x1b[m\n\x1b[m'
+                '\x1b[m\x1b[41m  \x1b[44m \x1b[m\n\x1b[m'
+                ) == stream.getvalue()
+
+    def test_matrix_buffer(self):
+        from pyterm.chart import ColorScale, heatmap_rows
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        scale = ColorScale(term, ['BG_BLUE', 'BG_RED'], 0, 2)
+        matrix = memoryview(bytes([0, 1, 1, 0])).cast('B', (2, 2))
+        assert ['\x1b[44m \x1b[41m \x1b[m\n',
+                '\x1b[41m \x1b[44m \x1b[m\n'] == \
+            list(heatmap_rows(term, matrix, scale, ' '))
+
+    def test_sparkline(self):
+        from pyterm.chart import ColorScale, sparkline
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        sparkline(term, [0, 7, 3.5])
+        assert '\x1b[m▁█▅\x1b[m' == stream.getvalue()
+        scale = ColorScale(term, ['GREEN', 'RED'], 0, 8)
+        sparkline(term, [0, 1, 7], high=7, scale=scale)
+        assert stream.getvalue().endswith(
+            '\x1b[m\x1b[32m▁▂\x1b[31m█\x1b[m\x1b[m')
+
+
+    def test_binary(self):
+        from io import BytesIO
+        from pyterm.binary import BinaryTerm
+        from pyterm.chart import ColorScale, heatmap, sparkline
+        stream = BytesIO()
+        term = BinaryTerm(stream, code='ansi', use_colors=True)
+        scale = ColorScale(term, ['BG_BLUE', 'BG_RED'], 0, 2)
+        heatmap(term, [[0, 1]], scale, ' ')
+        assert b'\x1b[m\x1b[44m \x1b[41m \x1b[m\n\x1b[m' == stream.getvalue()
+        stream.seek(0)
+        stream.truncate(0)
+        sparkline(term, [0, 2], scale=scale)
+        assert ('\x1b[m\x1b[44m▁\x1b[41m█\x1b[m\x1b[m'.encode('utf-8') ==
+                stream.getvalue())
+
+
+class TestLog(object):
+    def _logger(self, name, handler):
+        import logging
+        logger = logging.getLogger('pyterm.test.' + name)
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        del logger.handlers[:]
+        logger.addHandler(handler)
+        return logger
+
+    def test_level_styles(self):
+        from pyterm.log import TermHandler
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        logger = self._logger('styles', TermHandler(
+            term, fmt='{levelname:|LEVEL UNDERLINE}:{message}'))
+        logger.info('x %s', 1)
+        logger.critical('y')
+        logger.log(15, 'z') # level without style
+        assert ('\x1b[m\x1b[32m\x1b[4mINFO\x1b[m:x 1\n\x1b[m'
+                '\x1b[m\x1b[31m\x1b[1m\x1b[4mCRITICAL\x1b[m:y\n\x1b[m'
+                '\x1b[m\x1b[4mLevel 15\x1b[m:z\n\x1b[m') == stream.getvalue()
+        # codes of the Term are not modified
+        assert 'LOG_CRITICAL' not in term.codes
+
+    def test_shared_term(self):
+        from pyterm.log import TermHandler
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        red = self._logger('red', TermHandler(
+            term, fmt='{message:|LEVEL}', level_styles={20: ('RED',)}))
+        blue = self._logger('blue', TermHandler(
+            term, fmt='{message:|LEVEL}', level_styles={20: ('BLUE',)}))
+        red.info('r')
+        blue.info('b')
+        red.info('r')
+        assert ('\x1b[m\x1b[31mr\x1b[m\n\x1b[m'
+                '\x1b[m\x1b[34mb\x1b[m\n\x1b[m'
+                '\x1b[m\x1b[31mr\x1b[m\n\x1b[m') == stream.getvalue()
+
+    def test_nested_spec(self):
+        from pyterm.log import TermHandler
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        logger = self._logger('nested', TermHandler(
+            term, fmt='{levelname:{width}|LEVEL}:{message}'))
+        logger.info('x', extra={'width': 6})
+        assert '\x1b[m\x1b[32mINFO  \x1b[m:x\n\x1b[m' == stream.getvalue()
+
+    def test_dumb(self):
+        from pyterm.log import TermHandler
+        from pyterm.pyterm import DumbTerm
+        stream = StringIO()
+        term = Term(stream=stream, use_colors=False)
+        logger = self._logger('dumb', TermHandler(term))
+        logger.warning('x')
+        assert 'WARNING  pyterm.test.dumb: x\n' == stream.getvalue()
+        assert isinstance(term, DumbTerm)
+
+    def test_listener(self):
+        import threading
+        from pyterm.log import TermHandler, TermListener
+        stream = StringIO()
+        term = Term(stream=stream, use_colors=False)
+        term.enable_stats()
+        handler = TermHandler(term, fmt='{message}')
+        handler.setLevel('INFO')
+        listener = TermListener(handler)
+        logger = self._logger('queue', listener.queue_handler())
+        threads = [threading.Thread(target=logger.info, args=('t%d', n))
+                   for n in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.debug('filtered by handler level')
+        # written from listener thread, all queued records at once
+        assert '' == stream.getvalue()
+        with listener:
+            pass
+        assert sorted('t%d' % n for n in range(10)) == \
+            sorted(stream.getvalue().splitlines())
+        assert 1 == term.stats()['writes']
+
+
+class TestFooter(object):
+    def test_footer(self):
+        from pyterm.footer import Footer
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        footer = Footer(term, 2, rows=10, cols=5)
+        # region is lines above footer
+        assert ('\x1b[m\n\n\x1b[A\x1b[A\x1b[s\x1b[1;8r\x1b[u\x1b[m' ==
+                stream.getvalue())
+        stream.seek(0)
+        stream.truncate(0)
+        footer.update('status line', 'b')
+        assert ('\x1b[m\x1b[s\x1b[9;1Hstatu\x1b[m\x1b[K'
+                '\x1b[10;1Hb\x1b[m\x1b[K\x1b[u\x1b[m' == stream.getvalue())
+        # only changed lines are drawn
+        stream.seek(0)
+        stream.truncate(0)
+        footer.update('status line', 'c')
+        footer.set(1, 'c')
+        assert ('\x1b[m\x1b[s\x1b[10;1Hc\x1b[m\x1b[K\x1b[u\x1b[m' ==
+                stream.getvalue())
+        stream.seek(0)
+        stream.truncate(0)
+        footer.close()
+        assert ('\x1b[m\x1b[s\x1b[9;1H\x1b[J\x1b[1;10r\x1b[u\x1b[m' ==
+                stream.getvalue())
+
+    def test_resize(self):
+        from pyterm.footer import Footer
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        footer = Footer(term, 2, rows=10, cols=5)
+        footer.update('a', 'b')
+        stream.seek(0)
+        stream.truncate(0)
+        # nothing written by resize
+        footer.resize(rows=12, cols=3)
+        assert '' == stream.getvalue()
+        assert 10 == footer.rows
+        # applied on next draw, all lines are drawn
+        footer.set(0, 'status')
+        assert (12, 3) == (footer.rows, footer.cols)
+        assert ('\x1b[m\n\n\x1b[A\x1b[A\x1b[s\x1b[1;10r\x1b[u\x1b[m'
+                '\x1b[m\x1b[s\x1b[11;1Hsta\x1b[m\x1b[K'
+                '\x1b[12;1Hb\x1b[m\x1b[K\x1b[u\x1b[m' == stream.getvalue())
+        stream.seek(0)
+        stream.truncate(0)
+        footer.update('status', 'b')
+        assert '' == stream.getvalue()
+
+    def test_not_capable(self):
+        from pyterm.footer import Footer
+        pytest.raises(ValueError, Footer, Term(stream=StringIO()))
+
+
+class TestCursor(object):
+    def test_cheapest(self):
+        term = Term(stream=StringIO(), code='ansi', use_colors=True)
+        movement = term.movement
+        # position unknown: absolute
+        assert '\x1b[6;11H' == movement.move(5, 10)
+        # parameterized relative move
+        assert '\x1b[8C' == movement.move(5, 10, 5, 2)
+        # single steps
+        assert '\x1b[B\x1b[C' == movement.move(6, 3, 5, 2)
+        # carriage return + offset
+        assert '\x1b[G' == movement.move(5, 0, 5, 60)
+        assert '\x1b[59D' == movement.move(5, 1, 5, 60)
+        # absolute cheaper than relative
+        assert '\x1b[1;1H' == movement.move(0, 0, 20, 20)
+        assert movement is Term(stream=StringIO(), code='ansi',
+                                use_colors=True).movement
+
+    def test_line_feed(self):
+        from pyterm.cursor import Movement
+        codes = {'NORMAL': '', 'UP': '\x1b[A', 'DOWN': '\n', 'BOL': '\r',
+                 'LEFT': '\b', 'RIGHT': '\x1b[C', 'DOWN_N': '\x1b[%dB',
+                 'RIGHT_N': '\x1b[%dC', 'MOVE': '\x1b[%i%d;%dH'}
+        movement = Movement(codes, 'ansi')
+        assert '\n\n\r' == movement.move(7, 0, 5, 3)
+        # line-feed would lose column
+        assert '\x1b[2B' == movement.move(7, 3, 5, 3)
+        assert '\b\b' == movement.move(5, 1, 5, 3)
+        assert '\x1b[3B' == movement.vertical(3, keep_col=True)
+
+    def test_absolute_only(self):
+        from pyterm.cursor import Movement
+        codes = {'NORMAL': '', 'MOVE': '\x1b[%i%d;%dH'}
+        movement = Movement(codes, 'ansi')
+        assert '\x1b[6;4H' == movement.move(5, 3)
+        assert '\x1b[6;4H' == movement.move(5, 3, 2, 3)
+        assert '\x1b[6;4H' == movement.move(5, 3, 5, 0)
+        assert '' == movement.move(5, 3, 5, 3)
+
+    def test_term_move(self):
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        term.move_to(2, 3)('a').move_by(-1, 4)('b').move_by(1, -2, 5)('c')
+        assert ('\x1b[m\x1b[3;4Ha\x1b[m'
+                '\x1b[m\x1b[A\x1b[4Cb\x1b[m'
+                '\x1b[m\x1b[B\x1b[2Dc\x1b[m') == stream.getvalue()
+        stream = StringIO()
+        term = Term(stream=stream)
+        term.move_to(2, 3)('a').move_by(1, 1)('b')
+        assert 'ab' == stream.getvalue()
+
+    def test_screen(self):
+        from pyterm import Screen
+        stream = StringIO()
+        term = Term(stream=stream, code='ansi', use_colors=True)
+        screen = Screen(term, 3, cols=40)
+        stream.seek(0)
+        stream.truncate(0)
+        screen.write(0, 30, 'x')
+        screen.present()
+        assert '\x1b[m\x1b[2A\x1b[30Cx\x1b[m' == stream.getvalue()
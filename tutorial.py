@@ -83,5 +83,11 @@ term5 = Term(code='ansi')
 print(escape(term5['BOL']))
 
 
+# RGB colors are sent as they are to truecolor terminals,
+# other terminals get the nearest color they support
+term.rgb(255, 136, 0)('orange\n')
+print(term.format('{:|#ff8800} on {:|BG_#003366}', 'orange', 'dark blue'))
+
+
 # check the demo to see the colors and available capabilities
 term.demo()